@@ -0,0 +1,283 @@
+"""Time loading, applying and presets against a generated SPT_Data tree; no display needed.
+
+    python benchmark.py --scale current --output bench_before.json
+    python benchmark.py --scale large --output bench_after.json --compare bench_before.json
+    python benchmark.py --bot-types 500 --globals-mb 40 --keep /tmp/spt_synthetic
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from bulk_options import FileIndex, create_bulk_options
+from cli import log_error_sink
+from config_cache import ConfigCache
+from config_loader import get_streamed_paths, initialize_directories, load_all_config_files
+from config_manager import ConfigManager
+from config_schema import ConfigSchema
+from config_util import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, read_config, save_config, scan_directory
+from error_reporting import set_error_sink
+from preset_util import apply_preset, create_preset
+from resource_util import compile_option_paths, create_lookup_table, get_option_path, invalidate_option_paths, resource_path
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FORMAT = 1
+
+# "current" matches the shipped required_files.json; "large" is a heavily modded install.
+SCALES = {
+    "current": {"bot_types": 0, "globals_mb": 1, "bot_kb": 150, "options_per_file": 15},
+    "medium": {"bot_types": 100, "globals_mb": 5, "bot_kb": 150, "options_per_file": 15},
+    "large": {"bot_types": 300, "globals_mb": 20, "bot_kb": 150, "options_per_file": 15},
+}
+
+# The filler of a generated file is split into this many keys around its options
+FILLER_CHUNKS = 4
+
+class HeadlessVar:
+    """Stands in for a Tk variable, so ConfigManager and presets run without a display."""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+def random_value(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.randint(0, 500)
+    if kind < 0.7:
+        return round(rng.uniform(0, 10), 3)
+    if kind < 0.9:
+        return rng.random() < 0.5
+    return rng.choice(["low", "medium", "high"])
+
+def filler_items(rng: random.Random, target_bytes: int) -> List[Dict[str, Any]]:
+    """Item-like records adding up to roughly target_bytes of JSON."""
+    items, size = [], 0
+    while size < target_bytes:
+        item = {
+            "_id": "%024x" % rng.getrandbits(96),
+            "_tpl": "%024x" % rng.getrandbits(96),
+            "weight": round(rng.uniform(0, 20), 2),
+            "stackable": rng.random() < 0.3,
+            "props": {"Name": f"item_{len(items)}", "Prefab": {"path": f"assets/content/items/{len(items)}.bundle", "rcid": ""}},
+        }
+        items.append(item)
+        size += 200
+    return items
+
+def generate_file(rng: random.Random, prefix: str, options_per_file: int, target_bytes: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return (tree, metadata options) for one synthetic config file.
+
+    Option paths are global keys, so each file's options live under its own prefix.
+    The filler is split into FILLER_CHUNKS keys and the options are placed at a
+    seeded random position among them, so streamed loads do not always find
+    every option before the bulk of the file.
+    """
+    values, options = {}, {}
+    for index in range(options_per_file):
+        section = f"section{index % 4}"
+        values.setdefault(section, {})[f"option{index}"] = random_value(rng)
+        options[f"{prefix}.{section}.option{index}"] = {"displayName": f"Option {index}", "description": f"Synthetic {section} option {index}", "group": section}
+    chunk_bytes = target_bytes // FILLER_CHUNKS
+    keys = [f"filler{index}" for index in range(FILLER_CHUNKS)]
+    keys.insert(rng.randint(0, FILLER_CHUNKS), prefix)
+    tree = {key: values if key == prefix else filler_items(rng, chunk_bytes) for key in keys}
+    return tree, options
+
+def generate_tree(directory: str, bot_types: int, globals_mb: float, bot_kb: float, options_per_file: int, seed: int = 0):
+    """Write SPT_Data/Server plus matching metadata.json and required_files.json; return (metadata, required_files)."""
+    rng = random.Random(seed)
+    shipped = read_config(resource_path(os.path.join('src', 'required_files.json')))
+    sizes = {relative_path: 8 * 1024 for relative_path in shipped}
+    sizes["database/globals.json"] = int(globals_mb * 1024 * 1024)
+    for relative_path in shipped:
+        if relative_path.startswith("database/bots/types/"):
+            sizes[relative_path] = int(bot_kb * 1024)
+    for index in range(bot_types):
+        sizes[f"database/bots/types/synthetic{index:04d}.json"] = int(bot_kb * 1024)
+
+    metadata = {"Configs": {}, "Globals": {}, "Bots": {}}
+    for relative_path, target_bytes in sizes.items():
+        prefix = os.path.splitext(relative_path)[0].replace("/", "_")
+        tree, options = generate_file(rng, prefix, options_per_file, target_bytes)
+        full_path = os.path.join(directory, 'SPT_Data', 'Server', relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            json.dump(tree, f, indent=2)
+        tab = "Bots" if relative_path.startswith("database/bots/") else "Globals" if relative_path.startswith("database/") else "Configs"
+        metadata[tab][relative_path] = options
+
+    required_files = list(sizes)
+    save_config(os.path.join(directory, "metadata.json"), metadata)
+    save_config(os.path.join(directory, "required_files.json"), required_files)
+    return metadata, required_files
+
+def measure(function, repeat: int):
+    """Run function repeat times; return (every wall time, peak traced bytes of one extra run, last result)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    # Memory is traced in a separate run, since tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return times, peak, result
+
+def run_benchmarks(directory: str, metadata, required_files, repeat: int, output_format: str, edit_fraction: float, seed: int = 0):
+    rng = random.Random(seed)
+    base_directory = directory
+    stages = {}
+
+    def record(name, function):
+        times, peak, result = measure(function, repeat)
+        stages[name] = {"seconds": min(times), "mean_seconds": sum(times) / len(times), "runs": times, "peak_bytes": peak}
+        print(f"{name:24} {min(times) * 1000:10.1f} ms  peak {peak / 1024 / 1024:8.1f} MB", flush=True)
+        return result
+
+    def lookup():
+        invalidate_option_paths()
+        lookup_table = create_lookup_table(metadata)
+        compile_option_paths(metadata)
+        return lookup_table
+
+    lookup_table = record("create_lookup_table", lookup)
+    config_data = record("load_all_config_files", lambda: load_all_config_files(required_files, base_directory))
+    record("load_streamed", lambda: load_all_config_files(required_files, base_directory, streamed_paths=get_streamed_paths(lookup_table)))
+    cache = ConfigCache(os.path.join(directory, "config_cache"))
+    load_all_config_files(required_files, base_directory, cache)
+    record("load_cache_warm", lambda: load_all_config_files(required_files, base_directory, cache))
+
+    CONFIG_DIR, DATABASE_DIR, _ = initialize_directories(base_directory)
+    ui_vars = {relative_path: {} for relative_path in required_files}
+    for option_path, relative_path in lookup_table.items():
+        if relative_path in config_data:
+            ui_vars[relative_path][option_path] = HeadlessVar(get_option_path(option_path).get(config_data[relative_path]))
+    option_paths = sorted(lookup_table)
+    edits = max(1, int(len(option_paths) * edit_fraction))
+
+    def apply():
+        # ConfigManager.apply_changes without its result dialog
+        config_manager = ConfigManager(required_files, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, lookup_table, output_format)
+        for option_path in rng.sample(option_paths, edits):
+            relative_path = lookup_table[option_path]
+            var = ui_vars[relative_path][option_path]
+            value = var.get()
+            var.set(not value if isinstance(value, bool) else str(value) if isinstance(value, str) else str(value + 1))
+            config_manager.mark_dirty(relative_path, option_path)
+        results = config_manager.write_changes(ui_vars)
+        failed = {relative_path: str(error) for relative_path, error in results.items() if error is not None}
+        if failed:
+            raise RuntimeError(f"apply failed: {failed}")
+        return len(results)
+
+    record("apply_changes", apply)
+
+    # One pattern option set across every bot type file, as a single apply
+    pattern, bulk_path = "database/bots/types/*.json", "*.section0.option0"
+    bot_files = FileIndex(scan_directory(os.path.join(directory, 'SPT_Data', 'Server'))).match(pattern)
+    bulk_metadata = {"Bots": {pattern: {bulk_path: {"displayName": "Bulk option", "type": "number"}}}}
+
+    def apply_bulk():
+        config_manager = ConfigManager(required_files, config_data, bulk_metadata, base_directory, CONFIG_DIR, DATABASE_DIR, lookup_table, output_format)
+        create_bulk_options(pattern, bulk_metadata["Bots"][pattern], bot_files, config_data, config_manager.bulk_options)
+        config_manager.mark_dirty(pattern, bulk_path)
+        results = config_manager.write_changes({pattern: {bulk_path: HeadlessVar(str(rng.randint(0, 500)))}})
+        failed = {relative_path: str(error) for relative_path, error in results.items() if error is not None}
+        if failed:
+            raise RuntimeError(f"bulk apply failed: {failed}")
+        return len(results)
+
+    bulk_files = record("apply_bulk", apply_bulk) if bot_files else 0
+    preset_path = os.path.join(directory, "preset.json")
+    record("preset_save", lambda: save_config(preset_path, create_preset(required_files, config_data, lookup_table)))
+    schema = ConfigSchema(metadata)
+    schema.learn(config_data)
+    record("preset_load", lambda: apply_preset(read_config(preset_path), required_files, config_data, ui_vars, schema))
+    return stages, {"option_paths": len(option_paths), "edited_options": edits, "bulk_files": bulk_files}
+
+def compare(results, previous) -> None:
+    if previous.get("scale") != results["scale"]:
+        print("\nNote: the two runs used different data sizes or settings.")
+    print(f"\n{'stage':24} {'before':>10} {'after':>10} {'change':>8}")
+    for name, stage in results["stages"].items():
+        before = previous.get("stages", {}).get(name)
+        if before is None:
+            continue
+        change = (stage["seconds"] - before["seconds"]) / before["seconds"] * 100 if before["seconds"] else 0.0
+        print(f"{name:24} {before['seconds'] * 1000:8.1f}ms {stage['seconds'] * 1000:8.1f}ms {change:+7.1f}%")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the config tool against a generated SPT_Data tree.")
+    parser.add_argument("--scale", choices=SCALES, default="current", help="Preset data size (default: current).")
+    parser.add_argument("--bot-types", type=int, help="Number of extra bot type files.")
+    parser.add_argument("--globals-mb", type=float, help="Size of database/globals.json in MB.")
+    parser.add_argument("--bot-kb", type=float, help="Size of each bot type file in KB.")
+    parser.add_argument("--options-per-file", type=int, help="Metadata options per file.")
+    parser.add_argument("--edit-fraction", type=float, default=0.1, help="Share of options edited before each apply (default: 0.1).")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=DEFAULT_OUTPUT_FORMAT, help="How applied files are written.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the fastest is reported (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated data and edits.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results JSON.")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    parser.add_argument("--keep", metavar="DIRECTORY", help="Generate the tree here and keep it, instead of a temporary folder.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_error_sink(log_error_sink)
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    directory = args.keep or tempfile.mkdtemp(prefix="spt_benchmark_")
+    try:
+        start = time.perf_counter()
+        metadata, required_files = generate_tree(directory, seed=args.seed, **scale)
+        print(f"Generated {len(required_files)} files in {directory} ({time.perf_counter() - start:.1f}s)", flush=True)
+        stages, counts = run_benchmarks(directory, metadata, required_files, max(1, args.repeat), args.output_format, args.edit_fraction, args.seed)
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    results = {
+        "format": RESULTS_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": dict(scale, files=len(required_files), seed=args.seed, output_format=args.output_format, **counts),
+        "stages": stages,
+    }
+    if sys.platform != "win32":
+        import resource
+        # ru_maxrss is in bytes on macOS and in KB elsewhere
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results["max_rss_bytes"] = max_rss if sys.platform == "darwin" else max_rss * 1024
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, read_config(args.compare))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
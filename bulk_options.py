@@ -0,0 +1,147 @@
+import fnmatch
+import logging
+import posixpath
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from config_diff import MISSING, get_value, set_value
+from resource_util import OptionPath, get_option_path
+
+logger = logging.getLogger(__name__)
+
+# A key of an option path that matches every key of a dict or index of a list
+WILDCARD = "*"
+GLOB_CHARS = "*?["
+
+def is_file_pattern(filename: str) -> bool:
+    return any(char in filename for char in GLOB_CHARS)
+
+def get_file_patterns(metadata: Dict[str, Any]) -> List[str]:
+    """Return the metadata file entries that are glob patterns, in metadata order."""
+    patterns = []
+    for files in metadata.values():
+        for filename in files:
+            if is_file_pattern(filename) and filename not in patterns:
+                patterns.append(filename)
+    return patterns
+
+def join_option_path(keys: Iterable[str]) -> str:
+    """The inverse of split_option_path."""
+    return ".".join(str(key).replace("\\", "\\\\").replace(".", "\\.") for key in keys)
+
+class FileIndex:
+    """The JSON files under SPT_Data/Server grouped by directory, scanned once.
+
+    A pattern whose directory part has no wildcard is only matched against the
+    files of that directory.
+    """
+
+    def __init__(self, relative_paths: Iterable[str]):
+        self.directories: Dict[str, List[str]] = {}
+        for relative_path in relative_paths:
+            self.directories.setdefault(posixpath.dirname(relative_path), []).append(relative_path)
+        for files in self.directories.values():
+            files.sort()
+
+    def __len__(self) -> int:
+        return sum(len(files) for files in self.directories.values())
+
+    def match(self, pattern: str) -> List[str]:
+        directory = posixpath.dirname(pattern)
+        if is_file_pattern(directory):
+            candidates = [relative_path for name, files in sorted(self.directories.items())
+                          if fnmatch.fnmatchcase(name, directory) for relative_path in files]
+        else:
+            candidates = self.directories.get(directory, [])
+        return [relative_path for relative_path in candidates if fnmatch.fnmatchcase(relative_path, pattern)]
+
+def expand_file_patterns(metadata: Dict[str, Any], file_index: FileIndex) -> Dict[str, List[str]]:
+    """Map every file pattern in the metadata to the files it matches."""
+    return {pattern: file_index.match(pattern) for pattern in get_file_patterns(metadata)}
+
+def expand_keys(tree: Any, keys: Tuple[str, ...], prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[str, ...]]:
+    """Yield the keys of every value in tree matched by keys, where "*" matches any key or index."""
+    if not keys:
+        yield prefix
+        return
+    key, rest = keys[0], keys[1:]
+    if key == WILDCARD:
+        if isinstance(tree, dict):
+            children = tree.items()
+        elif isinstance(tree, list):
+            children = ((str(index), value) for index, value in enumerate(tree))
+        else:
+            return
+        for child_key, child in children:
+            yield from expand_keys(child, rest, prefix + (child_key,))
+        return
+    try:
+        child = OptionPath.step(tree, key)
+    except (KeyError, IndexError, ValueError, TypeError):
+        return
+    yield from expand_keys(child, rest, prefix + (key,))
+
+class BulkOption:
+    """A metadata option under a file pattern and the concrete option paths it matched in each file.
+
+    One UI variable, stored under the pattern name, drives the option;
+    ConfigManager copies its value to every target when changes are applied.
+    """
+    __slots__ = ("pattern", "option_path", "targets")
+
+    def __init__(self, pattern: str, option_path: str, targets: Dict[str, List[str]]):
+        self.pattern = pattern
+        self.option_path = option_path
+        self.targets = targets
+
+    @property
+    def count(self) -> int:
+        return sum(len(option_paths) for option_paths in self.targets.values())
+
+    def values(self, config_data: Dict[str, Any]) -> Iterator[Any]:
+        for relative_path, option_paths in self.targets.items():
+            for option_path in option_paths:
+                yield get_value(config_data[relative_path], get_option_path(option_path).keys)
+
+def expand_bulk_option(pattern: str, option_path: str, files: Iterable[str], config_data: Dict[str, Any]) -> BulkOption:
+    keys = get_option_path(option_path).keys
+    targets = {}
+    for relative_path in files:
+        tree = config_data.get(relative_path)
+        if tree is None:
+            continue
+        option_paths = [join_option_path(concrete) for concrete in expand_keys(tree, keys)]
+        if option_paths:
+            targets[relative_path] = option_paths
+    return BulkOption(pattern, option_path, targets)
+
+def create_bulk_options(pattern: str, options: Dict[str, Any], files: List[str], config_data: Dict[str, Any],
+                        bulk_options: Dict[Tuple[str, str], BulkOption]) -> Dict[str, Any]:
+    """Expand one pattern's options over its loaded files, each to be shown as a single option.
+
+    config_data[pattern] becomes a stand-in tree holding the first matched value
+    of every option, so the usual widgets, schema and undo work on it unchanged.
+    Options already in bulk_options (e.g. listed on another tab) are not expanded
+    again. Returns a copy of options whose display names say what they cover.
+    """
+    virtual = config_data.setdefault(pattern, {})
+    display = {}
+    for option_path, meta in options.items():
+        display[option_path] = meta
+        bulk = bulk_options.get((pattern, option_path))
+        expanded = bulk is None
+        if expanded:
+            bulk = bulk_options[(pattern, option_path)] = expand_bulk_option(pattern, option_path, files, config_data)
+        values = bulk.values(config_data)
+        first = next(values, MISSING)
+        if first is MISSING:
+            if expanded:
+                logger.warning(f"{pattern}: {option_path} matched nothing in {len(files)} file(s)")
+            continue
+        if expanded:
+            set_value(virtual, get_option_path(option_path).keys, first)
+        mixed = any(value != first or type(value) is not type(first) for value in values)
+        meta = dict(meta, displayName=f"{meta.get('displayName', option_path)} ({bulk.count} in {len(bulk.targets)} files)")
+        if mixed:
+            meta["description"] = (meta.get("description", "") + "\n\nThe files do not all have the same value; "
+                                   "this shows the first one. Applying a change sets every one of them.").strip()
+        display[option_path] = meta
+    return display
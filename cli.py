@@ -0,0 +1,124 @@
+"""Apply a preset to many SPT installs without the GUI.
+
+    python cli.py --preset presets/example_default.json /srv/spt1 /srv/spt2
+    python cli.py --preset my.json --installs installs.txt --workers 8 --output-format patch
+"""
+import argparse
+import os
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from config_cache import ConfigCache
+from config_diff import apply_entries
+from config_loader import STREAMED_PREFIXES, initialize_directories, load_all_config_files
+from config_manager import ConfigManager
+from config_util import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, read_config
+from error_reporting import set_error_sink
+from perf_trace import enable_tracing, trace_requested
+from preset_util import get_preset_files, is_sparse_preset
+from resource_util import compile_option_paths, create_lookup_table, resource_path
+
+logger = logging.getLogger(__name__)
+
+def log_error_sink(message, exception):
+    """Non-GUI error sink. Errors already reach stderr through logging; warnings are below its level."""
+    if exception is None:
+        print(f"Warning: {message}", file=sys.stderr)
+
+def apply_preset_to_install(base_directory, preset_data, required_files, metadata, lookup_table, output_format, cache=None):
+    """Load, patch and write one install; return a summary dict."""
+    summary = {"base_directory": base_directory, "changed": [], "errors": {}, "load_seconds": 0.0, "write_seconds": 0.0}
+    if not os.path.isdir(os.path.join(base_directory, 'SPT_Data', 'Server')):
+        summary["errors"][base_directory] = "SPT_Data/Server not found"
+        return summary
+
+    start = time.perf_counter()
+    # Only the preset's files are needed; a sparse preset only needs its paths from the large ones,
+    # a legacy preset is compared against whole files.
+    preset_files = [filename for filename in get_preset_files(preset_data) if filename in required_files]
+    streamed_paths = {}
+    if is_sparse_preset(preset_data):
+        streamed_paths = {filename: list(preset_data["options"][filename]) for filename in preset_files if filename.startswith(STREAMED_PREFIXES)}
+    config_data = load_all_config_files(preset_files, base_directory, cache, streamed_paths)
+    for filename in preset_files:
+        if filename not in config_data:
+            summary["errors"][filename] = "failed to load"
+    CONFIG_DIR, DATABASE_DIR, _ = initialize_directories(base_directory)
+    config_manager = ConfigManager(required_files, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, lookup_table, output_format)
+    entries = config_manager.diff_preset(preset_data, required_files)
+    apply_entries(entries, config_data)
+    summary["load_seconds"] = time.perf_counter() - start
+
+    for entry in entries:
+        if entry.option_path is None:
+            # Not an option, so the file cannot be patched and is written in full
+            config_manager.mark_file_dirty(entry.relative_path)
+        else:
+            config_manager.mark_dirty(entry.relative_path, entry.option_path)
+
+    start = time.perf_counter()
+    for filename, error in config_manager.write_changes({}).items():
+        if error is None:
+            summary["changed"].append(filename)
+        else:
+            summary["errors"][filename] = error
+    summary["write_seconds"] = time.perf_counter() - start
+    return summary
+
+def print_summary(summary):
+    status = "FAIL" if summary["errors"] else "OK"
+    print(f"{status:4} {summary['base_directory']}: {len(summary['changed'])} file(s) changed, "
+          f"load {summary['load_seconds']:.3f}s, write {summary['write_seconds']:.3f}s")
+    for filename in summary["changed"]:
+        print(f"       changed {filename}")
+    for filename, error in summary["errors"].items():
+        print(f"       error   {filename}: {error}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a preset to one or more SPT installs without the GUI.")
+    parser.add_argument("base_directories", nargs="*", help="Folders containing SPT_Data.")
+    parser.add_argument("--preset", required=True, help="Preset file to apply (sparse or legacy).")
+    parser.add_argument("--installs", help="Text file with one base directory per line.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of installs processed at the same time (default: 4).")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=DEFAULT_OUTPUT_FORMAT, help="How changed files are written.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the parsed-config cache.")
+    parser.add_argument("--trace", action="store_true", help="Record timing spans to trace.log and a Chrome trace in traces/.")
+    args = parser.parse_args(argv)
+    if args.installs:
+        with open(args.installs, 'r', encoding='utf-8') as f:
+            args.base_directories += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not args.base_directories:
+        parser.error("no base directories given")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_error_sink(log_error_sink)
+    if args.trace or trace_requested():
+        print(f"Writing timing trace to {enable_tracing()}")
+
+    required_files = read_config(resource_path(os.path.join('src', 'required_files.json')))
+    metadata = read_config(resource_path(os.path.join('src', 'metadata.json')))
+    lookup_table = create_lookup_table(metadata)
+    compile_option_paths(metadata)
+    preset_data = read_config(args.preset)
+    cache = None if args.no_cache else ConfigCache()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(apply_preset_to_install, base_directory, preset_data, required_files, metadata, lookup_table, args.output_format, cache)
+                   for base_directory in args.base_directories]
+        summaries = []
+        for future in futures:
+            summary = future.result()
+            print_summary(summary)
+            summaries.append(summary)
+
+    failed = sum(1 for summary in summaries if summary["errors"])
+    print(f"{len(summaries) - failed}/{len(summaries)} installs updated in {time.perf_counter() - start:.3f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
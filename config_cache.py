@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Iterable, Optional, Tuple
+from config_util import read_config
+from json_stream import PartialTree, extract_option_values
+
+logger = logging.getLogger(__name__)
+
+# Kept next to config_dir.json; safe to delete at any time.
+CACHE_DIR = "config_cache"
+CACHE_FORMAT = 1
+
+_MISS = object()
+
+class ConfigCache:
+    """Parsed JSON files stored in marshal form, keyed by path, size and mtime.
+
+    Each entry is a length-prefixed marshalled header (the source fingerprint)
+    followed by the marshalled data, so a stale entry is detected without
+    reading its data.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def entry_path(self, path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".marshal")
+
+    @staticmethod
+    def fingerprint(path: str) -> tuple:
+        stat = os.stat(path)
+        return (CACHE_FORMAT, tuple(sys.version_info[:2]), os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def read_header(f) -> tuple:
+        size = int.from_bytes(f.read(4), 'little')
+        return marshal.loads(f.read(size))
+
+    def get(self, path: str, fingerprint: tuple) -> Any:
+        try:
+            with open(self.entry_path(path), 'rb') as f:
+                if self.read_header(f) != fingerprint:
+                    return _MISS
+                # marshal.load() on a file object reads in small chunks; one read() is much faster
+                return marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return _MISS
+
+    def put(self, path: str, fingerprint: tuple, data: Any) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+            try:
+                header = marshal.dumps(fingerprint)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(len(header).to_bytes(4, 'little'))
+                    f.write(header)
+                    f.write(marshal.dumps(data))
+                os.replace(temp_path, self.entry_path(path))
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to cache {path}: {e}")
+
+    def load(self, path: str, option_paths: Optional[Iterable[str]] = None) -> Tuple[Any, bool]:
+        """Return (parsed content, cache hit) for a JSON file, refreshing its entry on a miss.
+
+        With option_paths only those values are extracted (see json_stream), and
+        the entry is only valid for that same set of paths.
+        """
+        fingerprint = self.fingerprint(path)
+        if option_paths is not None:
+            option_paths = tuple(sorted(option_paths))
+            fingerprint += (option_paths,)
+        data = self.get(path, fingerprint)
+        if data is not _MISS:
+            return (data if option_paths is None else PartialTree(data, option_paths)), True
+        if option_paths is None:
+            data = read_config(path)
+            self.put(path, fingerprint, data)
+        else:
+            data = extract_option_values(path, option_paths)
+            # marshal only handles plain dicts
+            self.put(path, fingerprint, dict(data))
+        return data, False
+
+    def prune(self) -> int:
+        """Delete entries whose source file no longer exists or that another Python wrote; return the count."""
+        removed = 0
+        try:
+            entries = os.listdir(self.cache_dir)
+        except OSError:
+            return 0
+        for entry in entries:
+            if not entry.endswith(".marshal"):
+                continue  # e.g. the preset index
+            entry_path = os.path.join(self.cache_dir, entry)
+            try:
+                with open(entry_path, 'rb') as f:
+                    header = self.read_header(f)
+                stale = header[:2] != (CACHE_FORMAT, tuple(sys.version_info[:2])) or not os.path.exists(header[2])
+            except (OSError, EOFError, ValueError, TypeError, IndexError):
+                stale = True
+            if stale:
+                try:
+                    os.remove(entry_path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+def measure_startup(required_files, base_directory, cache: ConfigCache) -> Tuple[float, float]:
+    """Time loading every required file without the cache (cold) and through a freshly filled cache (warm)."""
+    full_paths = [os.path.join(base_directory, 'SPT_Data', 'Server', relative_path) for relative_path in required_files]
+    full_paths = [full_path for full_path in full_paths if os.path.exists(full_path)]
+
+    start = time.perf_counter()
+    for full_path in full_paths:
+        read_config(full_path)
+    cold = time.perf_counter() - start
+
+    for full_path in full_paths:
+        cache.load(full_path)
+    start = time.perf_counter()
+    for full_path in full_paths:
+        cache.load(full_path)
+    warm = time.perf_counter() - start
+    return cold, warm
+
+if __name__ == "__main__":
+    from resource_util import CONFIG_FILE, get_setting, resource_path
+
+    base_directory = sys.argv[1] if len(sys.argv) > 1 else get_setting("base_directory")
+    if not base_directory:
+        sys.exit(f"Usage: python config_cache.py BASE_DIRECTORY (or set base_directory in {CONFIG_FILE})")
+    required_files = read_config(resource_path(os.path.join('src', 'required_files.json')))
+    cold, warm = measure_startup(required_files, base_directory, ConfigCache())
+    print(f"Cold load (JSON):  {cold * 1000:8.1f} ms")
+    print(f"Warm load (cache): {warm * 1000:8.1f} ms")
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from preset_util import is_sparse_preset
+from resource_util import OptionPath, get_option_path, invalidate_option_paths, split_option_path
+
+logger = logging.getLogger(__name__)
+
+# Marks a key that exists on only one side of a diff
+MISSING = object()
+
+class TreeHashes:
+    """Digests of every dict and list in a tree, computed once.
+
+    Equal digests mean equal subtrees, so a diff can skip a whole unchanged
+    branch with one comparison. They are BLAKE2 digests of the values' reprs
+    rather than hash(), whose collisions (hash(-1) == hash(-2)) would hide changes.
+    Dict digests do not depend on key order; 1, 1.0 and True differ because their
+    reprs do.
+    """
+
+    def __init__(self, tree: Any):
+        self.tree = tree  # keeps every node alive, so the ids below stay valid
+        self.hashes: Dict[int, str] = {}
+        self.hash(tree)
+
+    def hash(self, node: Any) -> str:
+        if isinstance(node, dict):
+            parts = ["d"] + sorted(f"{key!r}:{self.hash(value)}" for key, value in node.items())
+        elif isinstance(node, list):
+            parts = ["l"] + [self.hash(value) for value in node]
+        else:
+            return repr(node)
+        digest = hashlib.blake2b("\0".join(parts).encode('utf-8'), digest_size=16).hexdigest()
+        self.hashes[id(node)] = digest
+        return digest
+
+    def get(self, node: Any) -> str:
+        if isinstance(node, (dict, list)):
+            return self.hashes[id(node)]
+        return repr(node)
+
+# Hashes of the loaded trees, reused until the tree is replaced or its revision changes
+_live_hashes: Dict[str, Tuple[Any, int, TreeHashes]] = {}
+
+def get_tree_hashes(relative_path: str, tree: Any, revision: int) -> TreeHashes:
+    cached = _live_hashes.get(relative_path)
+    if cached is not None and cached[0] is tree and cached[1] == revision:
+        return cached[2]
+    hashes = TreeHashes(tree)
+    _live_hashes[relative_path] = (tree, revision, hashes)
+    return hashes
+
+def diff_trees(old: Any, old_hashes: TreeHashes, new: Any, new_hashes: TreeHashes, keys: Tuple = ()) -> Iterator[Tuple[Tuple, Any, Any]]:
+    """Yield (keys, old value, new value) for every differing branch; equal branches are skipped by digest.
+
+    Lists of different lengths are reported as one change, since their items cannot be paired up.
+    """
+    if type(old) is type(new) and (old_hashes.get(old) == new_hashes.get(new) if isinstance(old, (dict, list)) else old == new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in old.items():
+            if key in new:
+                yield from diff_trees(value, old_hashes, new[key], new_hashes, keys + (key,))
+            else:
+                yield keys + (key,), value, MISSING
+        for key, value in new.items():
+            if key not in old:
+                yield keys + (key,), MISSING, value
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_value, new_value) in enumerate(zip(old, new)):
+            yield from diff_trees(old_value, old_hashes, new_value, new_hashes, keys + (str(index),))
+    else:
+        yield keys, old, new
+
+class DiffEntry:
+    """One change a preset would make: an option, or a path that no option covers."""
+    __slots__ = ("relative_path", "option_path", "keys", "old", "new", "tab")
+
+    def __init__(self, relative_path: str, option_path: Optional[str], keys: Tuple, old: Any, new: Any, tab: str):
+        self.relative_path = relative_path
+        self.option_path = option_path
+        self.keys = keys
+        self.old = old
+        self.new = new
+        self.tab = tab
+
+    @property
+    def label(self) -> str:
+        return self.option_path or ".".join(str(key).replace(".", "\\.") for key in self.keys)
+
+def format_value(value: Any, limit: int = 80) -> str:
+    if value is MISSING:
+        return "(missing)"
+    text = json.dumps(value, default=str)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def get_option_tabs(metadata: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """Map (file, option path) to the first tab that shows the option."""
+    tabs = {}
+    for tab, files in metadata.items():
+        for filename, options in files.items():
+            for option_path in options:
+                tabs.setdefault((filename, option_path), tab)
+    return tabs
+
+def get_file_tabs(metadata: Dict[str, Any]) -> Dict[str, str]:
+    tabs = {}
+    for tab, files in metadata.items():
+        for filename in files:
+            tabs.setdefault(filename, tab)
+    return tabs
+
+def map_changes_to_options(relative_path: str, changes, option_paths: List[str], option_tabs, file_tab: str) -> List[DiffEntry]:
+    """Turn raw tree changes into entries, one per affected option.
+
+    A change inside an option's value reports the whole option once; a change of a
+    container holding options reports each of them; anything else is reported by path.
+    """
+    by_keys = {split_option_path(option_path): option_path for option_path in option_paths}
+    below = {}
+    for option_keys, option_path in by_keys.items():
+        for length in range(len(option_keys)):
+            below.setdefault(option_keys[:length], []).append(option_path)
+
+    entries, seen = [], set()
+    for keys, old, new in changes:
+        option_path = next((by_keys[keys[:length]] for length in range(len(keys), 0, -1) if keys[:length] in by_keys), None)
+        if option_path is not None:
+            if option_path not in seen:
+                seen.add(option_path)
+                entries.append(DiffEntry(relative_path, option_path, get_option_path(option_path).keys, None, None, option_tabs.get((relative_path, option_path), file_tab)))
+            continue
+        for option_path in below.get(keys, ()):
+            if option_path not in seen:
+                seen.add(option_path)
+                entries.append(DiffEntry(relative_path, option_path, get_option_path(option_path).keys, None, None, option_tabs.get((relative_path, option_path), file_tab)))
+        entries.append(DiffEntry(relative_path, None, keys, old, new, file_tab))
+    return entries
+
+def get_value(tree: Any, keys: Tuple) -> Any:
+    try:
+        for key in keys:
+            tree = OptionPath.step(tree, key)
+        return tree
+    except (KeyError, IndexError, ValueError, TypeError):
+        return MISSING
+
+def set_value(tree: Any, keys: Tuple, value: Any) -> None:
+    """Set (or delete, for MISSING) the value at keys, creating missing dicts on the way."""
+    container = tree
+    for key in keys[:-1]:
+        if isinstance(container, dict) and key not in container:
+            container[key] = {}
+        container = OptionPath.step(container, key)
+    key = int(keys[-1]) if isinstance(container, list) else keys[-1]
+    if value is MISSING:
+        if isinstance(container, dict):
+            container.pop(key, None)
+    else:
+        container[key] = value
+    invalidate_option_paths()
+
+def diff_preset(preset_data: Dict[str, Any], preset_hashes: Optional[TreeHashes], config_files: List[str], config_data: Dict[str, Any],
+                metadata: Dict[str, Any], lookup_table: Dict[str, str], revisions: Dict[str, int], schema=None, current_values=None) -> List[DiffEntry]:
+    """List what applying a preset would change in the loaded configs.
+
+    Legacy (whole-file) presets are compared structurally against the loaded trees,
+    so the cost follows the number of differences once both sides are hashed.
+    Sparse presets are compared option by option. current_values(file, option path)
+    may return an unapplied UI value to compare against instead of the tree, and
+    option values on both sides are coerced through schema first when one is given.
+    """
+    def coerce(filename, option_path, value):
+        if schema is None or value is MISSING:
+            return value
+        coerced, errors = schema.validate(filename, {option_path: value})
+        return value if errors else coerced[option_path]
+
+    option_tabs = get_option_tabs(metadata)
+    file_tabs = get_file_tabs(metadata)
+    file_options: Dict[str, List[str]] = {}
+    for option_path, filename in lookup_table.items():
+        file_options.setdefault(filename, []).append(option_path)
+
+    entries = []
+    if is_sparse_preset(preset_data):
+        for filename, options in preset_data["options"].items():
+            if filename not in config_files or config_data.get(filename) is None:
+                continue
+            for option_path, value in options.items():
+                entries.append(DiffEntry(filename, option_path, get_option_path(option_path).keys, None, value, option_tabs.get((filename, option_path), file_tabs.get(filename, ""))))
+    else:
+        for filename in config_files:
+            if filename not in preset_data or config_data.get(filename) is None:
+                continue
+            live = config_data[filename]
+            live_hashes = get_tree_hashes(filename, live, revisions.get(filename, 0))
+            changes = diff_trees(live, live_hashes, preset_data[filename], preset_hashes, ())
+            entries.extend(map_changes_to_options(filename, changes, file_options.get(filename, []), option_tabs, file_tabs.get(filename, "")))
+            # Unapplied edits differ from the tree, so they may differ from the preset even where the tree does not
+            if current_values is not None:
+                listed = {entry.option_path for entry in entries if entry.relative_path == filename}
+                for option_path in file_options.get(filename, []):
+                    if option_path not in listed and current_values(filename, option_path) is not MISSING:
+                        entries.append(DiffEntry(filename, option_path, get_option_path(option_path).keys, None, None, option_tabs.get((filename, option_path), file_tabs.get(filename, ""))))
+
+    preset_trees = None if is_sparse_preset(preset_data) else preset_data
+    changed = []
+    for entry in entries:
+        if entry.option_path is not None:
+            current = current_values(entry.relative_path, entry.option_path) if current_values is not None else MISSING
+            entry.old = current if current is not MISSING else get_value(config_data[entry.relative_path], entry.keys)
+            if preset_trees is not None:
+                entry.new = get_value(preset_trees[entry.relative_path], entry.keys)
+            entry.old = coerce(entry.relative_path, entry.option_path, entry.old)
+            entry.new = coerce(entry.relative_path, entry.option_path, entry.new)
+        if entry.option_path is not None and entry.new is MISSING:
+            continue  # the preset does not have the option; leave it as it is
+        if entry.old != entry.new or type(entry.old) is not type(entry.new):
+            changed.append(entry)
+    return changed
+
+def apply_entries(entries: List[DiffEntry], config_data: Dict[str, Any]) -> None:
+    """Write the selected entries' preset values into config_data."""
+    for entry in entries:
+        set_value(config_data[entry.relative_path], entry.keys, entry.new)
@@ -0,0 +1,171 @@
+import os
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional
+from config_util import read_config
+from error_reporting import report_error, report_warning
+from json_stream import PartialTree, extract_option_values
+from perf_trace import span
+from resource_util import invalidate_option_paths
+
+logger = logging.getLogger(__name__)
+
+# Files under these folders are large and only a few of their values are in
+# metadata.json, so only those values are extracted instead of parsing the file.
+STREAMED_PREFIXES = ("database/",)
+
+def get_streamed_paths(lookup_table: Dict[str, str]) -> Dict[str, List[str]]:
+    """Return the option paths to extract for every streamed file in the lookup table."""
+    streamed_paths = {}
+    for option_path, filename in lookup_table.items():
+        if filename.startswith(STREAMED_PREFIXES):
+            streamed_paths.setdefault(filename, []).append(option_path)
+    return streamed_paths
+
+class ConfigLoader:
+    """Parse SPT config files on a background thread pool.
+
+    Files are parsed in the order they are submitted. Results are moved into
+    config_data (and errors into failures) by collect(), which is meant to be
+    called from the Tk thread. Files listed in streamed_paths are loaded as a
+    PartialTree holding only those option paths.
+    """
+
+    def __init__(self, base_directory: str, max_workers: Optional[int] = None, cache=None, streamed_paths: Optional[Dict[str, List[str]]] = None):
+        self.base_directory = base_directory
+        self.cache = cache
+        self.streamed_paths = streamed_paths or {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="config-loader")
+        self.futures = {}
+        self.config_data: Dict[str, Any] = {}
+        self.failures: Dict[str, Exception] = {}
+        # (seconds, cache hit) for every successfully loaded file
+        self.timings: Dict[str, tuple] = {}
+        # (size, mtime_ns) of every loaded file as it was when read
+        self.fingerprints: Dict[str, tuple] = {}
+        # Called as on_collect(relative_path, data) with every file's data as parsed
+        self.on_collect = None
+        self.created = time.perf_counter()
+
+    def determine_full_path(self, relative_path: str) -> str:
+        return os.path.join(self.base_directory, 'SPT_Data', 'Server', relative_path)
+
+    def submit(self, relative_paths: Iterable[str]) -> None:
+        """Queue files for loading; files that are already queued are skipped."""
+        for relative_path in relative_paths:
+            if relative_path not in self.futures:
+                self.futures[relative_path] = self.executor.submit(self.read, self.determine_full_path(relative_path), self.streamed_paths.get(relative_path))
+
+    def read(self, full_path: str, option_paths: Optional[List[str]] = None):
+        """Parse one file (through the cache when there is one); runs on a worker thread.
+
+        The (size, mtime) fingerprint is taken before reading, so a change made
+        while the file is being read is still seen as a change afterwards.
+        """
+        start = time.perf_counter()
+        with span("load_file", path=full_path) as load_span:
+            stat = os.stat(full_path)
+            fingerprint = (stat.st_size, stat.st_mtime_ns)
+            if self.cache is not None:
+                data, hit = self.cache.load(full_path, option_paths)
+            elif option_paths is not None:
+                data, hit = extract_option_values(full_path, option_paths), False
+            else:
+                data, hit = read_config(full_path), False
+            load_span.set(bytes=stat.st_size, options=len(option_paths) if option_paths is not None else None, cache_hit=hit)
+        return data, hit, time.perf_counter() - start, fingerprint
+
+    def reload(self, relative_path: str):
+        """Read a file again right away; return (data, fingerprint)."""
+        data, _, _, fingerprint = self.read(self.determine_full_path(relative_path), self.streamed_paths.get(relative_path))
+        return data, fingerprint
+
+    def load_full(self, relative_paths: Iterable[str]) -> None:
+        """Replace streamed files that are loaded as a PartialTree by their whole tree.
+
+        The extracted values, which may have been edited, are kept. The file is
+        no longer streamed afterwards, so a reload also reads all of it.
+        """
+        for relative_path in relative_paths:
+            tree = self.config_data.get(relative_path)
+            if not isinstance(tree, PartialTree):
+                continue
+            full_tree, _, _, _ = self.read(self.determine_full_path(relative_path))
+            self.config_data[relative_path] = tree.merge_into(full_tree)
+            self.streamed_paths.pop(relative_path, None)
+            invalidate_option_paths()
+
+    def is_done(self, relative_path: str) -> bool:
+        return relative_path in self.config_data or relative_path in self.failures
+
+    def is_ready(self, relative_paths: Iterable[str]) -> bool:
+        """Return True once every given file has been collected, successfully or not."""
+        return all(self.is_done(relative_path) for relative_path in relative_paths)
+
+    def collect(self, block: bool = False) -> List[str]:
+        """Move finished results into config_data/failures and return the newly collected files."""
+        pending = {relative_path: future for relative_path, future in self.futures.items() if not self.is_done(relative_path)}
+        if block and pending:
+            wait(pending.values())
+        collected = []
+        for relative_path, future in pending.items():
+            if not future.done():
+                continue
+            try:
+                self.config_data[relative_path], hit, seconds, self.fingerprints[relative_path] = future.result()
+                self.timings[relative_path] = (seconds, hit)
+                if self.on_collect is not None:
+                    self.on_collect(relative_path, self.config_data[relative_path])
+            except Exception as e:
+                logger.error(f"Failed to load configuration file: {relative_path}: {e}")
+                self.failures[relative_path] = e
+            collected.append(relative_path)
+        return collected
+
+    def ensure_loaded(self, relative_paths: Iterable[str]) -> None:
+        """Load the given files now, blocking until every one of them is collected."""
+        self.submit(relative_paths)
+        self.collect(block=True)
+
+    def progress(self):
+        """Return (collected, submitted) file counts."""
+        return sum(1 for relative_path in self.futures if self.is_done(relative_path)), len(self.futures)
+
+    def summary(self) -> str:
+        hits = sum(1 for _, hit in self.timings.values() if hit)
+        seconds = sum(seconds for seconds, _ in self.timings.values())
+        elapsed = time.perf_counter() - self.created
+        return f"{len(self.timings)} files loaded ({hits} from cache) in {elapsed:.3f}s, {seconds:.3f}s of worker time"
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def initialize_directories(base_directory):
+    """Initialize the required directories."""
+    try:
+        CONFIG_DIR = os.path.join(base_directory, 'SPT_Data', 'Server', 'configs')
+        DATABASE_DIR = os.path.join(base_directory, 'SPT_Data', 'Server', 'database')
+        PRESETS_DIR = os.path.join(base_directory, 'user/mods/turtles-serverconfig/presets')
+        return CONFIG_DIR, DATABASE_DIR, PRESETS_DIR
+    except Exception as e:
+        report_error("Error initializing directories", e)
+        return None, None, None
+
+def load_all_config_files(required_files, base_directory, cache=None, streamed_paths=None):
+    """Load only the required configuration files."""
+    try:
+        loader = ConfigLoader(base_directory, cache=cache, streamed_paths=streamed_paths)
+        loader.ensure_loaded(required_files)
+        loader.shutdown()
+        logger.info(f"Loaded configuration: {loader.summary()}")
+        report_load_failures(loader.failures)
+        return loader.config_data
+    except Exception as e:
+        report_error("Error loading all config files", e)
+        return {}
+
+def report_load_failures(failures):
+    """Show a single warning listing every configuration file that failed to load."""
+    if failures:
+        report_warning("Failed to load configuration files. They may be missing or misspelled:\n" + "\n".join(failures))
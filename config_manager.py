@@ -1,16 +1,24 @@
 import os
 import json
 import logging
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import CancelledError
 from tkinter import messagebox
 from typing import Any, Dict
-from config_util import ensure_directory_exists, save_config, load_file_content
-from error_reporting import report_error
+from config_diff import TreeHashes, diff_preset
+from config_schema import ConfigSchema, SchemaError
+from config_util import DEFAULT_OUTPUT_FORMAT, save_configs
+from perf_trace import span
+from preset_util import is_sparse_preset
+from resource_util import get_option_path
+from ui_util import create_progress_dialog, set_variable_value, update_progress_dialog
 
 logger = logging.getLogger(__name__)
 
 class ConfigManager:
-    def __init__(self, config_files, config_data, metadata, base_directory, config_dir, database_dir, lookup_table):
+    def __init__(self, config_files, config_data, metadata, base_directory, config_dir, database_dir, lookup_table, output_format=DEFAULT_OUTPUT_FORMAT):
         self.config_files = config_files
         self.config_data = config_data
         self.metadata = metadata
@@ -18,77 +26,303 @@ class ConfigManager:
         self.config_dir = config_dir
         self.database_dir = database_dir
         self.lookup_table = lookup_table
+        self.output_format = output_format
+        self.schema = ConfigSchema(metadata)
+        # Options edited since the last apply, keyed by file, and files whose
+        # whole tree was replaced (e.g. by a preset) and must be rewritten.
+        self.dirty_options = {}
+        self.dirty_files = set()
+        # Dirty state of the files currently being written, restored if they fail
+        self.in_flight = {}
+        self.apply_thread = None
+        self.apply_callbacks = []
+        # Set while UI variables are refreshed from disk, so those writes are not edits
+        self.tracking_paused = False
+        self.file_monitor = None
+        # Bumped whenever a file's tree or one of its UI variables may have changed
+        self.revisions = {}
+        # BulkOption of every option under a metadata file pattern, keyed by (pattern, option path)
+        self.bulk_options = {}
+
+    def mark_dirty(self, relative_path, option_path):
+        """Record that an option's UI variable was written since the last apply."""
+        if self.tracking_paused:
+            return
+        self.dirty_options.setdefault(relative_path, set()).add(option_path)
+        self.revisions[relative_path] = self.revisions.get(relative_path, 0) + 1
+
+    def mark_file_dirty(self, relative_path):
+        """Record that a file's config tree changed outside of its UI variables."""
+        self.dirty_files.add(relative_path)
+        self.revisions[relative_path] = self.revisions.get(relative_path, 0) + 1
+
+    def diff_preset(self, preset_data, config_files, current_values=None):
+        """List what applying a preset would change in the loaded configs, as config_diff.diff_preset does."""
+        # Option types are inferred from the files before the preset overwrites them
+        self.schema.learn(self.config_data)
+        preset_hashes = None if is_sparse_preset(preset_data) else TreeHashes(preset_data)
+        return diff_preset(preset_data, preset_hashes, config_files, self.config_data, self.metadata,
+                           self.lookup_table, self.revisions, self.schema, current_values)
+
+    def pending_files(self):
+        """Return the files that have to be written on the next apply."""
+        return [relative_path for relative_path in self.config_files
+                if relative_path in self.dirty_files or self.dirty_options.get(relative_path)]
 
     def apply_changes(self, ui_vars):
-        all_success = True
-        for relative_path, options in ui_vars.items():
-            success = self.process_file(relative_path, options)
-            if not success:
-                all_success = False
-        self.show_result_message(all_success)
+        self.show_result_message(self.write_changes(ui_vars))
+
+    def write_changes(self, ui_vars):
+        """Write every pending file and return the error (or None) per file, without showing anything."""
+        with span("apply") as apply_span:
+            to_save, patch_values, results = self.prepare_changes(ui_vars)
+            apply_span.set(files=len(to_save), options=self.count_in_flight_options())
+            results.update(self.save_files(to_save, patch_values))
+            return self.finish_changes(results)
+
+    def prepare_changes(self, ui_vars):
+        """Copy the edited UI values into config_data and take the files to write off the dirty set.
+
+        Runs on the Tk thread. Returns (files to save, patch values, results so far);
+        edits made while the files are being written mark them dirty again.
+        """
+        results = {}
+        to_save = []
+        self.schema.learn(self.config_data)
+        self.expand_bulk_changes(ui_vars, results)
+        for relative_path in self.pending_files():
+            try:
+                error = self.process_file(relative_path, ui_vars.get(relative_path, {}))
+            except Exception as e:
+                logger.error(f"Error processing file {relative_path}: {e}", exc_info=True)
+                error = "failed to update from the UI"
+            if error is None:
+                to_save.append(relative_path)
+            else:
+                results[relative_path] = error
+        patch_values = self.get_patch_values(to_save)
+        for relative_path in to_save:
+            self.in_flight[relative_path] = (self.dirty_options.pop(relative_path, set()), relative_path in self.dirty_files)
+            self.dirty_files.discard(relative_path)
+        return to_save, patch_values, results
+
+    def expand_bulk_changes(self, ui_vars, results):
+        """Copy every edited bulk option to each path it matched and mark those paths dirty.
+
+        The matched files are then validated and written by the same apply as
+        every other pending file. A pattern with an invalid value keeps its edits
+        and gets a SchemaError in results.
+        """
+        for pattern in {pattern for pattern, _ in self.bulk_options}:
+            option_paths = self.dirty_options.get(pattern)
+            if not option_paths:
+                continue
+            virtual = self.config_data[pattern]
+            options = ui_vars.get(pattern, {})
+            values = {}
+            for option_path in option_paths:
+                var = options.get(option_path)
+                try:
+                    values[option_path] = var.get() if var is not None else get_option_path(option_path).get(virtual)
+                except (KeyError, IndexError, ValueError, TypeError, tk.TclError):
+                    continue
+            coerced, errors = self.schema.validate(pattern, values)
+            if errors:
+                results[pattern] = SchemaError(sorted(errors))
+                continue
+            del self.dirty_options[pattern]
+            for option_path, value in coerced.items():
+                get_option_path(option_path).set(virtual, value)
+                bulk = self.bulk_options.get((pattern, option_path))
+                if bulk is not None:
+                    self.set_bulk_value(bulk, value, ui_vars)
+
+    def set_bulk_value(self, bulk, value, ui_vars):
+        for relative_path, option_paths in bulk.targets.items():
+            tree = self.config_data.get(relative_path)
+            if tree is None:
+                continue
+            changed = set()
+            for option_path in option_paths:
+                try:
+                    get_option_path(option_path).set(tree, value)
+                except (KeyError, IndexError, ValueError, TypeError) as e:
+                    # The file was changed on disk since the pattern was expanded
+                    logger.warning(f"{bulk.pattern}: {option_path} no longer exists in {relative_path}: {e}")
+                    continue
+                changed.add(option_path)
+                # An option also listed on its own would otherwise be written back from its stale variable
+                var = ui_vars.get(relative_path, {}).get(option_path)
+                if var is not None:
+                    self.tracking_paused = True
+                    try:
+                        set_variable_value(var, value)
+                    finally:
+                        self.tracking_paused = False
+            if changed:
+                self.dirty_options.setdefault(relative_path, set()).update(changed)
+                self.revisions[relative_path] = self.revisions.get(relative_path, 0) + 1
+
+    def finish_changes(self, results):
+        """Put files that were not written back on the dirty set and return the results."""
+        for relative_path, error in results.items():
+            options, file_dirty = self.in_flight.pop(relative_path, (set(), False))
+            if error is not None:
+                self.dirty_options.setdefault(relative_path, set()).update(options)
+                if file_dirty:
+                    self.dirty_files.add(relative_path)
+        if self.file_monitor is not None:
+            self.file_monitor.acknowledge([relative_path for relative_path, error in results.items() if error is None])
+        return results
+
+    def count_in_flight_options(self):
+        return sum(len(options) for options, _ in self.in_flight.values())
+
+    def apply_changes_async(self, root, ui_vars):
+        """Apply on a worker thread with a progress dialog that can cancel the remaining files.
+
+        UI values are read here on the Tk thread; progress and results come back
+        through a queue polled with root.after, so the window stays responsive.
+        The worker serializes the live trees, so the dialog is modal and nothing
+        may change config_data while apply_thread is set.
+        """
+        if self.apply_thread is not None:
+            return
+        apply_span = span("apply")
+        to_save, patch_values, results = self.prepare_changes(ui_vars)
+        apply_span.set(files=len(to_save), options=self.count_in_flight_options())
+        if not to_save:
+            apply_span.end()
+            self.show_result_message(self.finish_changes(results))
+            self.run_apply_callbacks()
+            return
+
+        cancel_event = threading.Event()
+        messages = queue.Queue()
+        dialog = create_progress_dialog(root, "Applying changes...", len(to_save), cancel_event.set)
+
+        def work():
+            try:
+                saved = self.save_files(to_save, patch_values, cancel_event, lambda relative_path, error: messages.put(relative_path))
+            except Exception as e:
+                logger.error(f"Error applying changes: {e}", exc_info=True)
+                saved = {relative_path: e for relative_path in to_save}
+            messages.put(saved)
+
+        def poll():
+            saved = None
+            while True:
+                try:
+                    message = messages.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(message, dict):
+                    saved = message
+                else:
+                    update_progress_dialog(dialog, message)
+            if saved is None:
+                root.after(50, poll)
+                return
+            dialog.destroy()
+            self.apply_thread = None
+            results.update(saved)
+            apply_span.end()
+            self.show_result_message(self.finish_changes(results))
+            self.run_apply_callbacks()
+
+        # Not a daemon thread, so a started write is never cut off by the interpreter exiting
+        self.apply_thread = threading.Thread(target=work, name="config-apply")
+        self.apply_thread.start()
+        poll()
+
+    def when_applied(self, callback):
+        """Call callback once no apply is running (right away if none is)."""
+        if self.apply_thread is None:
+            callback()
+        else:
+            self.apply_callbacks.append(callback)
+
+    def run_apply_callbacks(self):
+        callbacks, self.apply_callbacks = self.apply_callbacks, []
+        for callback in callbacks:
+            callback()
 
     def process_file(self, relative_path, options):
-        try:
-            for option_path, var in options.items():
-                self.update_config_data(option_path, var, relative_path)
-
-            full_path = self.determine_full_path(relative_path)
-
-            existing_content = load_file_content(full_path)
-            if existing_content == self.config_data[relative_path]:
-                return True
-
-            return self.save_file(full_path, self.config_data[relative_path])
-        except Exception as e:
-            report_error(f"Error processing file {relative_path}", e)
-            return False
-
-    def update_config_data(self, option_path, var, relative_path):
-        keys = option_path.split('.')
-        current_value = self.config_data[relative_path]
-        for key in keys[:-1]:
-            current_value = current_value[key]
-
-        self.set_config_value(current_value, keys[-1], var, relative_path, option_path)
-
-    def set_config_value(self, current_value, last_key, var, relative_path, option_path):
-        try:
-            if isinstance(var, tk.BooleanVar):
-                current_value[last_key] = var.get()
-            elif isinstance(var, tk.StringVar):
-                value_type = self.get_value_type(relative_path, option_path)
-                current_value[last_key] = self.convert_value(var.get(), value_type)
-        except ValueError as e:
-            report_error(f"Invalid value for {option_path}", e)
-
-    def get_value_type(self, relative_path, option_path):
-        filename = self.lookup_table.get(option_path)
-        if filename and filename in self.metadata and option_path in self.metadata[filename]:
-            return self.metadata[filename][option_path].get("type")
-        return None
+        """Validate a file's edited values in one pass and copy them into config_data.
 
-    @staticmethod
-    def convert_value(value, value_type):
-        if value_type == "float":
-            return float(value)
-        elif value_type == "int":
-            return int(value)
-        return value
+        Values come from the UI variables, or from the tree for options without
+        one (presets, the headless CLI). Nothing is copied unless every value is
+        valid; returns None or a SchemaError listing every invalid field.
+        """
+        tree = self.config_data[relative_path]
+        option_paths = set(self.dirty_options.get(relative_path, ()))
+        if relative_path in self.dirty_files:
+            option_paths.update(self.schema.file_options(relative_path))
+        values = {}
+        for option_path in option_paths:
+            var = options.get(option_path)
+            try:
+                values[option_path] = var.get() if var is not None else get_option_path(option_path).get(tree)
+            except (KeyError, IndexError, ValueError, TypeError, tk.TclError):
+                continue
+        coerced, errors = self.schema.validate(relative_path, values)
+        if errors:
+            return SchemaError(sorted(errors))
+        for option_path, value in coerced.items():
+            get_option_path(option_path).set(tree, value)
+        self.revisions[relative_path] = self.revisions.get(relative_path, 0) + 1
+        return None
 
     def determine_full_path(self, relative_path):
         return os.path.join(self.base_directory, 'SPT_Data', 'Server', relative_path)
 
-    def save_file(self, full_path, config_data):
-        try:
-            ensure_directory_exists(full_path)
-            return save_config(full_path, config_data)
-        except OSError as e:
-            report_error(f"Failed to save configuration file: {full_path}", e)
-            return False
+    def get_patch_values(self, relative_paths):
+        """Collect the edited option values of files that can be patched in place.
+
+        Files whose whole tree was replaced are left out and written in full.
+        """
+        if self.output_format != "patch":
+            return {}
+        patch_values = {}
+        for relative_path in relative_paths:
+            if relative_path in self.dirty_files:
+                continue
+            try:
+                patch_values[relative_path] = {option_path: get_option_path(option_path).get(self.config_data[relative_path])
+                                               for option_path in self.dirty_options.get(relative_path, ())}
+            except (KeyError, IndexError, ValueError, TypeError):
+                continue
+        return patch_values
+
+    def save_files(self, relative_paths, patch_values=None, cancel_event=None, on_progress=None):
+        """Write the given files concurrently and atomically; return the error (or None) per file."""
+        full_paths = {self.determine_full_path(relative_path): relative_path for relative_path in relative_paths}
+        configs = {full_path: self.config_data[relative_path] for full_path, relative_path in full_paths.items()}
+        patch_values = {self.determine_full_path(relative_path): values for relative_path, values in (patch_values or {}).items()}
+        if on_progress is not None:
+            report = on_progress
+            on_progress = lambda full_path, error: report(full_paths[full_path], error)
+        results = save_configs(configs, self.output_format, patch_values=patch_values, cancel_event=cancel_event, on_progress=on_progress)
+        return {full_paths[full_path]: error for full_path, error in results.items()}
 
     @staticmethod
-    def show_result_message(all_success):
-        if all_success:
-            messagebox.showinfo("Info", "All configurations saved successfully!")
+    def show_result_message(results):
+        cancelled = [relative_path for relative_path, error in results.items() if isinstance(error, CancelledError)]
+        invalid = {relative_path: error for relative_path, error in results.items() if isinstance(error, SchemaError)}
+        failed = {relative_path: error for relative_path, error in results.items()
+                  if error is not None and relative_path not in cancelled and relative_path not in invalid}
+        if invalid:
+            # Every invalid field of every file in one dialog; those files keep their pending changes
+            details = "\n".join(f"{relative_path}: {option_path}: {reason}"
+                                for relative_path, error in invalid.items() for option_path, reason in error.errors)
+            saved = sum(1 for error in results.values() if error is None)
+            messagebox.showwarning("Invalid values", f"These values are invalid, so their files were not written:\n{details}\n\n"
+                                   f"{saved} other file(s) were saved. Fix the values and apply again.")
+        if cancelled and not failed:
+            messagebox.showwarning("Cancelled", f"Apply cancelled. {len(cancelled)} file(s) were not written and still have pending changes.")
+        elif not failed:
+            if not invalid:
+                messagebox.showinfo("Info", "All configurations saved successfully!")
         else:
-            messagebox.showerror("Error", "Some configurations failed to save. Please check the logs for details.")
+            details = "\n".join(f"{relative_path}: {error}" for relative_path, error in failed.items())
+            messagebox.showerror("Error", f"Some configurations failed to save:\n{details}\n\nPlease check the logs for details.")
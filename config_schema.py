@@ -0,0 +1,172 @@
+import ast
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from resource_util import get_option_path
+
+logger = logging.getLogger(__name__)
+
+# Types an option can declare with "type" in metadata.json; "min"/"max" bound
+# numbers and "choices" lists the allowed values. Options that declare no
+# type get one inferred from the value in the config file as it was loaded.
+SCHEMA_TYPES = ("int", "float", "number", "bool", "str", "list", "dict")
+
+class SchemaError(ValueError):
+    """The invalid fields of one file, as (option path, reason) pairs."""
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return "invalid values: " + "; ".join(f"{option_path} ({reason})" for option_path, reason in self.errors)
+
+def infer_type(value: Any) -> Optional[str]:
+    """Return the schema type of a loaded config value, or None if any value is accepted.
+
+    Numbers written as strings by older versions of this app are treated as numbers,
+    so applying a file repairs them.
+    """
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        try:
+            float(value)
+            return "number"
+        except ValueError:
+            return "str"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, dict):
+        return "dict"
+    return None
+
+def parse_number(value: Any, value_type: str):
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                raise ValueError("expected a number") from None
+    if not isinstance(value, (int, float)) or value != value or value in (float("inf"), float("-inf")):
+        raise ValueError("expected a finite number")
+    if value_type == "int":
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError("expected a whole number")
+        return int(value)
+    if value_type == "float":
+        return float(value)
+    return value
+
+def parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes"):
+        return True
+    if text in ("false", "0", "no"):
+        return False
+    raise ValueError("expected true or false")
+
+def parse_container(value: Any, container: type):
+    if isinstance(value, str):
+        # The UI shows lists and dicts with str(), so accept Python literals as well as JSON
+        try:
+            value = json.loads(value)
+        except ValueError:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                raise ValueError(f"expected a {container.__name__}") from None
+    if not isinstance(value, container):
+        raise ValueError(f"expected a {container.__name__}")
+    return value
+
+class OptionSchema:
+    """Type, numeric range and allowed values of one option."""
+    __slots__ = ("type", "minimum", "maximum", "choices", "declared")
+
+    def __init__(self, meta: Dict[str, Any]):
+        self.type = meta.get("type")
+        if self.type is not None and self.type not in SCHEMA_TYPES:
+            logger.error(f"Unknown option type {self.type!r} in metadata; it is ignored.")
+            self.type = None
+        self.declared = self.type is not None
+        self.minimum = meta.get("min")
+        self.maximum = meta.get("max")
+        self.choices = meta.get("choices")
+
+    def coerce(self, value: Any):
+        """Return the value converted to the option's type, or raise ValueError saying why it is invalid."""
+        if self.type in ("int", "float", "number"):
+            value = parse_number(value, self.type)
+            if self.minimum is not None and value < self.minimum:
+                raise ValueError(f"must be at least {self.minimum}")
+            if self.maximum is not None and value > self.maximum:
+                raise ValueError(f"must be at most {self.maximum}")
+        elif self.type == "bool":
+            value = parse_bool(value)
+        elif self.type == "list":
+            value = parse_container(value, list)
+        elif self.type == "dict":
+            value = parse_container(value, dict)
+        elif self.type == "str" and not isinstance(value, str):
+            value = str(value)
+        if self.choices is not None and value not in self.choices:
+            raise ValueError("must be one of " + ", ".join(str(choice) for choice in self.choices))
+        return value
+
+class ConfigSchema:
+    """Every metadata option's schema, compiled once; undeclared types are learned per file."""
+
+    def __init__(self, metadata: Dict[str, Any]):
+        self.options: Dict[str, Dict[str, OptionSchema]] = {}
+        for files in metadata.values():
+            for filename, options in files.items():
+                file_options = self.options.setdefault(filename, {})
+                for option_path, meta in options.items():
+                    file_options[option_path] = OptionSchema(meta)
+        self.learned = set()
+
+    def learn(self, config_data: Dict[str, Any]) -> None:
+        """Infer the missing types from every loaded file that has not been seen yet.
+
+        Call this before presets or edits change the trees, so the types come
+        from the files as they are on disk.
+        """
+        for filename, tree in config_data.items():
+            if filename in self.learned or tree is None or filename not in self.options:
+                continue
+            self.learned.add(filename)
+            for option_path, schema in self.options[filename].items():
+                if schema.declared:
+                    continue
+                try:
+                    schema.type = infer_type(get_option_path(option_path).get(tree))
+                except (KeyError, IndexError, ValueError, TypeError):
+                    continue
+
+    def file_options(self, filename: str) -> List[str]:
+        return list(self.options.get(filename, ()))
+
+    def validate(self, filename: str, values: Dict[str, Any]):
+        """Coerce one file's values in a single pass; return (coerced values, [(option path, reason)])."""
+        file_options = self.options.get(filename, {})
+        coerced, errors = {}, []
+        for option_path, value in values.items():
+            schema = file_options.get(option_path)
+            if schema is None:
+                coerced[option_path] = value
+                continue
+            try:
+                coerced[option_path] = schema.coerce(value)
+            except ValueError as e:
+                errors.append((option_path, f"{e}, got {value!r}"))
+        return coerced, errors
@@ -1,11 +1,24 @@
 import json
 import logging
 import os  # Add the missing import
-from typing import Any, Dict, Optional
+import shutil
+import tempfile
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Union
 from error_reporting import report_error
+from json_stream import PartialTree, SpanMismatchError, patch_file
+from perf_trace import span
 
 logger = logging.getLogger(__name__)
 
+# "indented" is the historical 4-space layout, "compact" drops all whitespace and
+# "original" keeps whatever indentation the file on disk already uses. "patch"
+# only rewrites the bytes of the edited values and otherwise behaves like "original".
+OUTPUT_FORMATS = ("indented", "compact", "original", "patch")
+DEFAULT_OUTPUT_FORMAT = "indented"
+# Files written at the same time by a cancellable save; the rest wait, so cancelling still skips them
+CANCELLABLE_WORKERS = 2
+
 def load_config(path: str) -> Optional[Dict[str, Any]]:
     """Load a JSON configuration file from the given path."""
     try:
@@ -15,25 +28,150 @@ def load_config(path: str) -> Optional[Dict[str, Any]]:
         report_error(f"Error loading {path}", e)
         return None
 
-def save_config(path: str, config_data: Dict[str, Any]) -> bool:
+def detect_json_indent(path: str) -> Optional[Union[int, str]]:
+    """Guess the indentation of an existing JSON file, or None if it is compact.
+
+    Falls back to the default 4-space indentation when the file cannot be read.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            head = f.read(4096)
+    except OSError:
+        return 4
+    for line in head.splitlines()[1:]:
+        stripped = line.lstrip(' \t')
+        if stripped:
+            whitespace = line[:len(line) - len(stripped)]
+            if not whitespace:
+                continue
+            return '\t' if whitespace.startswith('\t') else len(whitespace)
+    return None
+
+def serialize_config(config_data: Any, output_format: str = DEFAULT_OUTPUT_FORMAT, path: Optional[str] = None) -> str:
+    """Serialize configuration data in the requested output format."""
+    if output_format in ("original", "patch") and path:
+        indent = detect_json_indent(path)
+    elif output_format == "compact":
+        indent = None
+    else:
+        indent = 4
+    if indent is None:
+        return json.dumps(config_data, separators=(',', ':'))
+    return json.dumps(config_data, indent=indent)
+
+def write_config(path: str, config_data: Any, output_format: str = DEFAULT_OUTPUT_FORMAT, cancel_event=None) -> None:
+    """Atomically write configuration data: write a temp file next to path, then rename it over path.
+
+    If cancel_event is set before the rename, the temp file is discarded and CancelledError raised.
+    """
+    content = serialize_config(config_data, output_format, path)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the permissions of the file being replaced.
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        else:
+            os.chmod(temp_path, 0o644)
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def save_config(path: str, config_data: Dict[str, Any], output_format: str = DEFAULT_OUTPUT_FORMAT) -> bool:
     """Save the given configuration data to a JSON file at the specified path."""
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=4)
-            return True
-    except OSError as e:
+        write_config(path, config_data, output_format)
+        return True
+    except (OSError, TypeError, ValueError) as e:
         report_error(f"Error saving {path}", e)
         return False
 
+def save_configs(configs: Dict[str, Any], output_format: str = DEFAULT_OUTPUT_FORMAT, max_workers: Optional[int] = None, patch_values: Optional[Dict[str, Dict[str, Any]]] = None, cancel_event=None, on_progress=None) -> Dict[str, Optional[Exception]]:
+    """Write several configuration files concurrently and return the error (or None) for each path.
+
+    In "patch" mode, files listed in patch_values only have those option values
+    spliced in, falling back to a full write when that is not possible. Once
+    cancel_event is set, files not yet replaced on disk keep their contents and
+    get a CancelledError; at most CANCELLABLE_WORKERS of them are written at a time.
+    on_progress(path, error) is called from the worker threads as files finish.
+    Errors are logged but not shown, so this is safe to call off the Tk thread.
+    """
+    def write(path):
+        with span("save_file", path=path, format=output_format) as save_span:
+            error = write_one(path, save_span)
+        if on_progress is not None:
+            on_progress(path, error)
+        return error
+
+    def write_one(path, save_span):
+        if cancel_event is not None and cancel_event.is_set():
+            save_span.set(cancelled=True)
+            return CancelledError()
+        try:
+            ensure_directory_exists(path)
+            if output_format == "patch" and patch_values and path in patch_values and os.path.exists(path):
+                try:
+                    patch_file(path, patch_values[path], cancel_event)
+                    save_span.set(bytes=os.path.getsize(path), options=len(patch_values[path]), patched=True)
+                    return None
+                except SpanMismatchError as e:
+                    logger.info(f"Falling back to a full write of {path}: {e}")
+            config_data = configs[path]
+            if isinstance(config_data, PartialTree):
+                # Only the extracted values are in memory; the full tree is needed just for writing
+                config_data = config_data.merge_into(read_config(path))
+            write_config(path, config_data, output_format, cancel_event)
+            save_span.set(bytes=os.path.getsize(path))
+            return None
+        except CancelledError as e:
+            save_span.set(cancelled=True)
+            return e
+        except Exception as e:
+            save_span.set(error=type(e).__name__)
+            logger.error(f"Error saving {path}: {e}", exc_info=True)
+            return e
+
+    if len(configs) <= 1:
+        return {path: write(path) for path in configs}
+    if max_workers is None and cancel_event is not None:
+        max_workers = CANCELLABLE_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(configs, executor.map(write, configs)))
+
 def ensure_directory_exists(filepath: str) -> None:
     """Ensure the directory for the given filepath exists."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
+def read_config(filepath: str) -> Any:
+    """Parse a JSON file, raising on failure instead of reporting it (safe off the Tk thread)."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def load_file_content(filepath: str) -> Optional[Dict[str, Any]]:
     """Load the content of the specified file."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_config(filepath)
     except (OSError, json.JSONDecodeError) as e:
         report_error(f"Error loading {filepath}", e)
         return None
+
+def scan_directory(directory: str, extension: str = ".json") -> Dict[str, str]:
+    """Scan the directory for files with a given extension, as {"sub/dir/file.json": full path}."""
+    try:
+        return {
+            os.path.relpath(os.path.join(root, file), directory).replace(os.sep, "/"): os.path.join(root, file)
+            for root, _, files in os.walk(directory)
+            for file in files if file.endswith(extension)
+        }
+    except Exception as e:
+        report_error(f"Error scanning directory {directory}", e)
+        return {}
@@ -0,0 +1,215 @@
+import json
+import logging
+import sys
+import time
+import tkinter as tk
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from config_diff import MISSING, get_value, set_value
+from resource_util import get_option_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = 8 * 1024 * 1024
+# Keystrokes in the same field closer together than this are undone as one edit
+COALESCE_SECONDS = 1.5
+
+def estimate_size(value: Any) -> int:
+    if value is MISSING or value is None or isinstance(value, bool):
+        return 16
+    if isinstance(value, (dict, list)):
+        return len(json.dumps(value, default=str))
+    return sys.getsizeof(value)
+
+class Delta:
+    """One path-level change: a UI variable (keys is None) or a value in a file tree."""
+    __slots__ = ("relative_path", "option_path", "keys", "before", "after", "size")
+
+    def __init__(self, relative_path: str, option_path: Optional[str], keys: Optional[Tuple], before: Any, after: Any):
+        self.relative_path = relative_path
+        self.option_path = option_path
+        self.keys = keys
+        self.before = before
+        self.after = after
+        # The values are the replaced objects themselves, not copies; a replaced
+        # subtree is no longer part of the tree, so sharing it is safe.
+        self.size = 100 + estimate_size(before) + estimate_size(after)
+
+class Edit:
+    __slots__ = ("label", "deltas", "time")
+
+    def __init__(self, label: str, deltas: List[Delta]):
+        self.label = label
+        self.deltas = deltas
+        self.time = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return sum(delta.size for delta in self.deltas)
+
+class EditHistory:
+    """Undo/redo of UI edits, toggles and preset loads, stored as path-level deltas.
+
+    Undoing an edit only touches the paths it changed. The oldest edits are
+    dropped once the recorded values exceed budget bytes.
+    """
+
+    def __init__(self, config_data: Dict[str, Any], ui_vars: Dict[str, Dict], config_manager, budget: int = DEFAULT_BUDGET):
+        self.config_data = config_data
+        self.ui_vars = ui_vars
+        self.config_manager = config_manager
+        self.budget = budget
+        self.undo_stack: List[Edit] = []
+        self.redo_stack: List[Edit] = []
+        self.size = 0
+        # Last seen value of every UI variable, the "before" of its next edit
+        self.values: Dict[Tuple[str, str], Any] = {}
+        self.replaying = False
+        self.watched: Optional[List[Tuple[str, Optional[str], Optional[Tuple], Any, Any]]] = None
+
+    def get_var(self, relative_path: str, option_path: str) -> Optional[tk.Variable]:
+        return self.ui_vars.get(relative_path, {}).get(option_path)
+
+    def last_value(self, relative_path: str, option_path: str, var: tk.Variable) -> Any:
+        key = (relative_path, option_path)
+        if key not in self.values:
+            # Never written since it was created from the tree
+            value = get_value(self.config_data.get(relative_path), get_option_path(option_path).keys)
+            self.values[key] = value if isinstance(var, tk.BooleanVar) else str(value)
+        return self.values[key]
+
+    def record_var(self, relative_path: str, option_path: str) -> None:
+        """Write trace of a UI variable: record the change as an edit."""
+        var = self.get_var(relative_path, option_path)
+        if var is None:
+            return
+        try:
+            value = var.get()
+        except tk.TclError:
+            return
+        before = self.last_value(relative_path, option_path, var)
+        self.values[(relative_path, option_path)] = value
+        if self.replaying or self.watched is not None or self.config_manager.tracking_paused or before == value:
+            # Undo/redo, grouped edits and reloads from disk only move the baseline
+            return
+        last = self.undo_stack[-1] if self.undo_stack else None
+        if (last is not None and not self.redo_stack and len(last.deltas) == 1 and last.deltas[0].keys is None
+                and last.deltas[0].option_path == option_path and last.deltas[0].relative_path == relative_path
+                and time.monotonic() - last.time < COALESCE_SECONDS and not isinstance(var, tk.BooleanVar)):
+            delta = last.deltas[0]
+            self.size -= delta.size
+            last.deltas[0] = Delta(relative_path, option_path, None, delta.before, value)
+            last.time = time.monotonic()
+            self.size += last.deltas[0].size
+            return
+        self.push(Edit(f"Edit {option_path}", [Delta(relative_path, option_path, None, before, value)]))
+
+    @contextmanager
+    def group(self, label: str, extend_option: Optional[Tuple[str, str]] = None):
+        """Record everything watched inside the block as one edit.
+
+        With extend_option=(file, option path), the deltas are added to the last
+        edit instead if it was the variable change of that option (a Checkbutton
+        flips its variable before its command runs).
+        """
+        if self.watched is not None:
+            yield
+            return
+        self.watched = []
+        try:
+            yield
+        finally:
+            watched, self.watched = self.watched, None
+            deltas = []
+            for relative_path, option_path, keys, tree_before, var_before in watched:
+                tree = self.config_data.get(relative_path)
+                if keys is not None and tree is not None:
+                    after = get_value(tree, keys)
+                    if after is not tree_before and after != tree_before:
+                        deltas.append(Delta(relative_path, option_path, keys, tree_before, after))
+                var = self.get_var(relative_path, option_path) if option_path else None
+                if var is not None:
+                    after = var.get()
+                    self.values[(relative_path, option_path)] = after
+                    if after != var_before:
+                        deltas.append(Delta(relative_path, option_path, None, var_before, after))
+            if deltas:
+                last = self.undo_stack[-1] if self.undo_stack else None
+                if (extend_option is not None and last is not None and not self.redo_stack and len(last.deltas) == 1
+                        and (last.deltas[0].relative_path, last.deltas[0].option_path) == extend_option):
+                    last.deltas.extend(deltas)
+                    last.label = label
+                    self.size += sum(delta.size for delta in deltas)
+                    self.evict()
+                else:
+                    self.push(Edit(label, deltas))
+
+    def watch(self, relative_path: str, option_path: Optional[str] = None, keys: Optional[Tuple] = None) -> None:
+        """Inside a group: remember the current tree value at keys (default: the option's path) and the option's variable."""
+        if self.watched is None:
+            return
+        if keys is None and option_path is not None:
+            keys = get_option_path(option_path).keys
+        tree = self.config_data.get(relative_path)
+        tree_before = get_value(tree, keys) if tree is not None and keys is not None else MISSING
+        var = self.get_var(relative_path, option_path) if option_path else None
+        var_before = self.last_value(relative_path, option_path, var) if var is not None else None
+        self.watched.append((relative_path, option_path, keys, tree_before, var_before))
+
+    def push(self, edit: Edit) -> None:
+        self.undo_stack.append(edit)
+        self.size += edit.size
+        for dropped in self.redo_stack:
+            self.size -= dropped.size
+        self.redo_stack.clear()
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop the oldest edits until the history fits its budget (the newest edit is always kept)."""
+        while self.size > self.budget and len(self.undo_stack) > 1:
+            self.size -= self.undo_stack.pop(0).size
+        while self.size > self.budget and self.redo_stack:
+            self.size -= self.redo_stack.pop(0).size
+
+    def undo(self) -> Optional[str]:
+        """Revert the last edit; return its label, or None if there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.replay(reversed(edit.deltas), "before")
+        self.redo_stack.append(edit)
+        return edit.label
+
+    def redo(self) -> Optional[str]:
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.replay(edit.deltas, "after")
+        self.undo_stack.append(edit)
+        return edit.label
+
+    def replay(self, deltas, side: str) -> None:
+        self.replaying = True
+        try:
+            for delta in deltas:
+                value = getattr(delta, side)
+                if delta.keys is None:
+                    var = self.get_var(delta.relative_path, delta.option_path)
+                    if var is not None:
+                        # The write trace marks the option dirty again
+                        var.set(value)
+                    continue
+                tree = self.config_data.get(delta.relative_path)
+                if tree is None:
+                    continue
+                try:
+                    set_value(tree, delta.keys, value)
+                except (KeyError, IndexError, ValueError, TypeError) as e:
+                    logger.error(f"Could not restore {delta.relative_path}: {'.'.join(map(str, delta.keys))}: {e}")
+                    continue
+                if delta.option_path is not None:
+                    self.config_manager.mark_dirty(delta.relative_path, delta.option_path)
+                else:
+                    self.config_manager.mark_file_dirty(delta.relative_path)
+        finally:
+            self.replaying = False
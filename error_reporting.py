@@ -3,6 +3,24 @@ from tkinter import messagebox
 
 logger = logging.getLogger(__name__)
 
+# When set, errors and warnings go to sink(message, exception) instead of a message box,
+# so the same code can run without a display (see cli.py).
+_error_sink = None
+
+def set_error_sink(sink) -> None:
+    global _error_sink
+    _error_sink = sink
+
 def report_error(message: str, exception: Exception):
     logger.error(f"{message}: {exception}", exc_info=True)
-    messagebox.showerror("Error", f"{message}: {exception}")
+    if _error_sink is not None:
+        _error_sink(message, exception)
+    else:
+        messagebox.showerror("Error", f"{message}: {exception}")
+
+def report_warning(message: str):
+    logger.warning(message)
+    if _error_sink is not None:
+        _error_sink(message, None)
+    else:
+        messagebox.showwarning("Warning", message)
@@ -0,0 +1,223 @@
+import copy
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional, Set
+
+from error_reporting import report_warning
+from resource_util import get_option_path
+from ui_util import update_ui_from_config
+
+logger = logging.getLogger(__name__)
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """Non-blocking inotify reader for the directories of the watched files (Linux only).
+
+    Directories are watched rather than files because editors and our own
+    writer replace files by renaming a temp file over them.
+    """
+
+    MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+    def __init__(self, directories: Iterable[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        try:
+            for directory in set(directories):
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+                self.watches[wd] = directory
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def read_changes(self) -> Optional[Set[str]]:
+        """Return the paths touched since the last call, or None if events were lost."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += _EVENT_HEADER.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    return None
+                if wd in self.watches and name:
+                    changed.add(os.path.normpath(os.path.join(self.watches[wd], os.fsdecode(name))))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class FileMonitor:
+    """Reload config files that another program changed on disk.
+
+    Candidates come from inotify where available, otherwise every loaded file
+    is polled; either way a file only counts as changed when its (size, mtime)
+    differs from the last time it was read or written by this app. Options
+    edited in the UI but not yet applied are kept and reported as conflicts.
+    """
+
+    def __init__(self, loader, config_manager, ui_vars: Dict[str, Dict], lookup_table: Dict[str, str], interval: int = 1000):
+        self.loader = loader
+        self.config_manager = config_manager
+        self.ui_vars = ui_vars
+        self.interval = interval
+        self.file_options: Dict[str, List[str]] = {}
+        for option_path, filename in lookup_table.items():
+            self.file_options.setdefault(filename, []).append(option_path)
+        # Option values as they were on disk when the file was last read or written,
+        # taken as files are collected, before any edit can reach their trees
+        self.baselines: Dict[str, Dict[str, object]] = {}
+        for relative_path, tree in loader.config_data.items():
+            if relative_path in loader.fingerprints:
+                self.record_baseline(relative_path, tree)
+        loader.on_collect = self.record_baseline
+        # Files to check again on the next tick even without a new inotify event
+        self.retry: Set[str] = set()
+        self.watcher = None
+        if sys.platform.startswith("linux"):
+            directories = [os.path.dirname(loader.determine_full_path(relative_path)) for relative_path in config_manager.config_files]
+            try:
+                self.watcher = InotifyWatcher(directory for directory in directories if os.path.isdir(directory))
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify unavailable, polling file sizes and mtimes instead: {e}")
+
+    def start(self, root) -> None:
+        self.root = root
+        root.after(self.interval, self.tick)
+
+    def tick(self) -> None:
+        try:
+            for relative_path in self.check():
+                self.reload(relative_path)
+        except Exception as e:
+            logger.error(f"Error checking config files for changes: {e}", exc_info=True)
+        self.root.after(self.interval, self.tick)
+
+    def option_values(self, relative_path: str, tree) -> Dict[str, object]:
+        """Copies of the file's option values, so later edits to the tree do not change them."""
+        values = {}
+        for option_path in self.file_options.get(relative_path, ()):
+            try:
+                value = get_option_path(option_path).get(tree)
+            except (KeyError, IndexError, ValueError, TypeError):
+                continue
+            values[option_path] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        return values
+
+    def record_baseline(self, relative_path: str, tree) -> None:
+        self.baselines[relative_path] = self.option_values(relative_path, tree)
+
+    def check(self) -> List[str]:
+        """Return the loaded files whose fingerprint changed.
+
+        Files being written right now or that cannot be read are checked again on the next tick.
+        """
+        loaded = [relative_path for relative_path in self.loader.config_data if relative_path in self.loader.fingerprints]
+        if self.watcher is not None:
+            touched = self.watcher.read_changes()
+            if touched is not None:
+                loaded = [relative_path for relative_path in loaded
+                          if relative_path in self.retry or os.path.normpath(self.loader.determine_full_path(relative_path)) in touched]
+        self.retry.clear()
+        changed = []
+        for relative_path in loaded:
+            if relative_path in self.config_manager.in_flight:
+                self.retry.add(relative_path)
+                continue
+            try:
+                stat = os.stat(self.loader.determine_full_path(relative_path))
+            except OSError:
+                self.retry.add(relative_path)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != self.loader.fingerprints[relative_path]:
+                changed.append(relative_path)
+        return changed
+
+    def reload(self, relative_path: str) -> None:
+        """Swap in the file's new content and refresh only the options whose value changed."""
+        try:
+            new_tree, fingerprint = self.loader.reload(relative_path)
+        except Exception as e:
+            # Most likely caught halfway through being written; try again on the next tick
+            logger.info(f"Could not reload {relative_path} yet: {e}")
+            self.retry.add(relative_path)
+            return
+
+        config_data = self.loader.config_data
+        if relative_path in self.config_manager.dirty_files:
+            # A preset replaced the whole tree; applying it will overwrite the file anyway
+            self.loader.fingerprints[relative_path] = fingerprint
+            report_warning(f"{relative_path} changed on disk, but a loaded preset has not been applied yet. Applying will overwrite the changes made on disk.")
+            return
+
+        baseline = self.baselines.get(relative_path, {})
+        on_disk = self.option_values(relative_path, new_tree)
+        dirty = self.config_manager.dirty_options.get(relative_path, set())
+        refreshed, conflicts = [], []
+        for option_path in set(baseline) | set(on_disk):
+            disk_changed = on_disk.get(option_path) != baseline.get(option_path)
+            if option_path in dirty:
+                # Keep the unapplied edit (toggles and presets store it in the tree)
+                try:
+                    accessor = get_option_path(option_path)
+                    accessor.set(new_tree, accessor.get(config_data[relative_path]))
+                except (KeyError, IndexError, ValueError, TypeError):
+                    pass
+                if disk_changed:
+                    conflicts.append(option_path)
+            elif disk_changed:
+                refreshed.append(option_path)
+
+        config_data[relative_path] = new_tree
+        self.loader.fingerprints[relative_path] = fingerprint
+        self.baselines[relative_path] = on_disk
+
+        self.config_manager.tracking_paused = True
+        try:
+            update_ui_from_config(relative_path, self.ui_vars, config_data, set(refreshed))
+        finally:
+            self.config_manager.tracking_paused = False
+        logger.info(f"Reloaded {relative_path} after an external change: {len(refreshed)} option(s) refreshed, {len(conflicts)} conflict(s)")
+        if conflicts:
+            report_warning(f"{relative_path} was changed on disk while these options have unapplied edits. "
+                           "Your edits were kept and will overwrite the disk values on apply:\n" + "\n".join(sorted(conflicts)))
+
+    def acknowledge(self, relative_paths: Iterable[str]) -> None:
+        """Record files this app just wrote, so they are not reloaded as external changes."""
+        for relative_path in relative_paths:
+            if relative_path not in self.loader.config_data:
+                continue
+            try:
+                stat = os.stat(self.loader.determine_full_path(relative_path))
+            except OSError:
+                continue
+            self.loader.fingerprints[relative_path] = (stat.st_size, stat.st_mtime_ns)
+            self.baselines[relative_path] = self.option_values(relative_path, self.loader.config_data[relative_path])
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
@@ -0,0 +1,309 @@
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import CancelledError
+from typing import Any, Dict, Iterable, Tuple
+from resource_util import get_option_path
+
+# Structural scanning over raw bytes: only the values at the requested option
+# paths are ever decoded, everything else is skipped without building objects.
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# Everything up to and including the next bracket that is not inside a string
+_NEXT_BRACKET = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])', re.S)
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+# A whole container nested up to CONTAINER_DEPTH levels deep, matched in one
+# call instead of one Python step per bracket. It needs possessive quantifiers
+# (Python 3.11+), without which the regex could backtrack exponentially; on
+# older versions, or for deeper containers, brackets are walked one by one.
+CONTAINER_DEPTH = 16
+
+def _compile_container(depth: int):
+    string = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    container = rb'[{\[](?:[^"{}\[\]]++|' + string + rb')*+[}\]]'
+    for _ in range(depth - 1):
+        container = rb'[{\[](?:[^"{}\[\]]++|' + string + rb'|' + container + rb')*+[}\]]'
+    try:
+        return re.compile(container)
+    except re.error:
+        return None
+
+_CONTAINER = _compile_container(CONTAINER_DEPTH)
+_BOM = b'\xef\xbb\xbf'
+
+class _AllFound(Exception):
+    pass
+
+class SpanMismatchError(ValueError):
+    """The file cannot be patched in place and has to be serialized in full."""
+
+# Byte spans of option values per file, valid while the file keeps the
+# (size, mtime) fingerprint they were recorded with.
+_span_index: Dict[str, Tuple[tuple, Dict[str, Tuple[int, int]]]] = {}
+_span_lock = threading.Lock()
+
+def _file_fingerprint(stat) -> tuple:
+    return (stat.st_size, stat.st_mtime_ns)
+
+def record_spans(path: str, fingerprint: tuple, spans: Dict[str, Tuple[int, int]]) -> None:
+    with _span_lock:
+        _span_index[os.path.abspath(path)] = (fingerprint, dict(spans))
+
+def get_recorded_spans(path: str) -> Dict[str, Tuple[int, int]]:
+    """Return the spans recorded for a file, or {} if the file changed since they were recorded."""
+    with _span_lock:
+        fingerprint, spans = _span_index.get(os.path.abspath(path), (None, {}))
+    try:
+        if fingerprint != _file_fingerprint(os.stat(path)):
+            return {}
+    except OSError:
+        return {}
+    return spans
+
+class PartialTree(dict):
+    """A skeleton of a JSON file holding only the subtrees at option_paths.
+
+    List indices in the original document become string keys of plain dicts,
+    which OptionPath handles transparently.
+    """
+
+    def __init__(self, data=None, option_paths: Iterable[str] = ()):
+        super().__init__(data or {})
+        self.option_paths = tuple(option_paths)
+
+    def outside_paths(self):
+        """Yield the keys of values that lie outside every option path, i.e. were added after extraction."""
+        def walk(node, trie, keys):
+            for key, value in node.items():
+                entry = trie.get(key)
+                if entry is None or (entry[1] is None and not isinstance(value, dict)):
+                    yield keys + (key,)
+                elif entry[1] is None:
+                    yield from walk(value, entry[0], keys + (key,))
+        return walk(self, build_key_trie(self.option_paths), ())
+
+    def merge_into(self, full_tree: Any) -> Any:
+        """Copy the extracted values into a fully parsed tree of the same file and return it.
+
+        Raises ValueError if the skeleton holds values outside its option paths,
+        since those could not be copied and would be lost.
+        """
+        outside = next(self.outside_paths(), None)
+        if outside is not None:
+            raise ValueError(f"Only the extracted option paths can be merged, not {'.'.join(outside)}")
+        for option_path in self.option_paths:
+            accessor = get_option_path(option_path)
+            try:
+                value = accessor.get(self)
+            except (KeyError, IndexError, ValueError, TypeError):
+                continue
+            accessor.set(full_tree, value)
+        return full_tree
+
+def build_key_trie(option_paths: Iterable[str]) -> Dict[str, list]:
+    """Map each key to [child trie, option path ending here or None]."""
+    trie = {}
+    for option_path in option_paths:
+        node = trie
+        keys = get_option_path(option_path).keys
+        for index, key in enumerate(keys):
+            entry = node.setdefault(key, [{}, None])
+            if index == len(keys) - 1:
+                entry[1] = option_path
+            node = entry[0]
+    return trie
+
+def _skip_whitespace(buffer, pos: int) -> int:
+    return _WHITESPACE.match(buffer, pos).end()
+
+def _skip_string(buffer, pos: int) -> int:
+    return _STRING_TAIL.match(buffer, pos + 1).end()
+
+def _skip_value(buffer, pos: int) -> int:
+    """Return the offset just past the JSON value starting at pos."""
+    char = buffer[pos:pos + 1]
+    if char == b'"':
+        return _skip_string(buffer, pos)
+    if char not in (b'{', b'['):
+        return _SCALAR.match(buffer, pos).end()
+    if _CONTAINER is not None:
+        match = _CONTAINER.match(buffer, pos)
+        if match is not None:
+            return match.end()
+    depth = 0
+    while True:
+        match = _NEXT_BRACKET.match(buffer, pos)
+        if match is None:
+            raise ValueError(f"Unterminated JSON container at offset {pos}")
+        pos = match.end()
+        if match.group(1) in (b'{', b'['):
+            inner = _CONTAINER.match(buffer, pos - 1) if _CONTAINER is not None and depth else None
+            if inner is not None:
+                # A nested container within the regex's depth is skipped whole
+                pos = inner.end()
+                continue
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+def _walk(buffer, pos: int, trie: Dict[str, list], spans: Dict[str, Tuple[int, int]], total: int) -> int:
+    """Record the spans of wanted values inside the value at pos and return its end offset."""
+    char = buffer[pos:pos + 1]
+    if char == b'{':
+        pos = _skip_whitespace(buffer, pos + 1)
+        if buffer[pos:pos + 1] == b'}':
+            return pos + 1
+        while True:
+            key_end = _skip_string(buffer, pos)
+            raw_key = buffer[pos + 1:key_end - 1]
+            key = json.loads(buffer[pos:key_end]) if b'\\' in raw_key else raw_key.decode('utf-8')
+            pos = _skip_whitespace(buffer, key_end)
+            if buffer[pos:pos + 1] != b':':
+                raise ValueError(f"Expected ':' at offset {pos}")
+            pos = _skip_whitespace(buffer, pos + 1)
+            pos = _walk_member(buffer, pos, trie.get(key), spans, total)
+            pos = _skip_whitespace(buffer, pos)
+            char = buffer[pos:pos + 1]
+            if char == b'}':
+                return pos + 1
+            if char != b',':
+                raise ValueError(f"Expected ',' or '}}' at offset {pos}")
+            pos = _skip_whitespace(buffer, pos + 1)
+    if char == b'[':
+        pos = _skip_whitespace(buffer, pos + 1)
+        if buffer[pos:pos + 1] == b']':
+            return pos + 1
+        index = 0
+        while True:
+            pos = _walk_member(buffer, pos, trie.get(str(index)), spans, total)
+            pos = _skip_whitespace(buffer, pos)
+            char = buffer[pos:pos + 1]
+            if char == b']':
+                return pos + 1
+            if char != b',':
+                raise ValueError(f"Expected ',' or ']' at offset {pos}")
+            pos = _skip_whitespace(buffer, pos + 1)
+            index += 1
+    return _skip_value(buffer, pos)
+
+def _walk_member(buffer, pos: int, entry, spans: Dict[str, Tuple[int, int]], total: int) -> int:
+    if entry is None:
+        return _skip_value(buffer, pos)
+    child, option_path = entry
+    end = _walk(buffer, pos, child, spans, total) if child else _skip_value(buffer, pos)
+    if option_path is not None:
+        spans[option_path] = (pos, end)
+        if len(spans) == total:
+            raise _AllFound()
+    return end
+
+def find_value_spans(buffer, option_paths: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """Return the (start, end) byte offsets of the values at the given option paths.
+
+    Scanning stops as soon as every path has been found; paths that do not
+    exist in the document are left out.
+    """
+    trie = build_key_trie(option_paths)
+    total = sum(1 for _ in _iter_option_paths(trie))
+    spans = {}
+    pos = len(_BOM) if buffer[:len(_BOM)] == _BOM else 0
+    try:
+        _walk(buffer, _skip_whitespace(buffer, pos), trie, spans, total)
+    except _AllFound:
+        pass
+    return spans
+
+def _iter_option_paths(trie):
+    for child, option_path in trie.values():
+        if option_path is not None:
+            yield option_path
+        yield from _iter_option_paths(child)
+
+def extract_option_values(path: str, option_paths: Iterable[str]) -> PartialTree:
+    """Read only the values at option_paths from a JSON file, without parsing the rest of it."""
+    option_paths = tuple(option_paths)
+    tree = PartialTree(option_paths=option_paths)
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError(f"Empty JSON file: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            spans = find_value_spans(buffer, option_paths)
+            for option_path, (start, end) in spans.items():
+                node = tree
+                keys = get_option_path(option_path).keys
+                for key in keys[:-1]:
+                    node = node.setdefault(key, {})
+                node[keys[-1]] = json.loads(buffer[start:end])
+        record_spans(path, _file_fingerprint(os.fstat(f.fileno())), spans)
+    return tree
+
+def _shift(offset: int, edits) -> int:
+    """Map an offset in the original buffer to the patched one."""
+    return offset + sum(delta for start, end, delta in edits if end <= offset)
+
+def patch_file(path: str, values: Dict[str, Any], cancel_event=None) -> None:
+    """Rewrite only the byte spans of the given option values, keeping the rest of the file as is.
+
+    The unchanged bytes are copied from a memory map of the original into a
+    temp file that replaces it atomically. Raises SpanMismatchError when a value
+    cannot be located or two edited values are nested in each other, and
+    CancelledError, leaving the file as it was, when cancel_event is set before
+    the temp file replaces it.
+    """
+    spans = get_recorded_spans(path)
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            raise SpanMismatchError(f"Empty JSON file: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if any(option_path not in spans for option_path in values):
+                spans = find_value_spans(buffer, set(spans) | set(values))
+            missing = [option_path for option_path in values if option_path not in spans]
+            if missing:
+                raise SpanMismatchError(f"Values not found in {path}: {', '.join(missing)}")
+
+            literals = sorted((spans[option_path], json.dumps(value).encode('utf-8'), option_path) for option_path, value in values.items())
+            for ((_, previous_end), _, _), ((start, _), _, _) in zip(literals, literals[1:]):
+                if start < previous_end:
+                    raise SpanMismatchError(f"Nested values cannot be patched together in {path}")
+
+            directory = os.path.dirname(path) or '.'
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    position = 0
+                    for (start, end), literal, _ in literals:
+                        out.write(buffer[position:start])
+                        out.write(literal)
+                        position = end
+                    out.write(buffer[position:])
+                    out.flush()
+                    os.fsync(out.fileno())
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+    edits = [(start, end, len(literal) - (end - start)) for (start, end), literal, _ in literals]
+    patched = {option_path: (start, end) for (start, end), _, option_path in literals}
+    new_spans = {}
+    for option_path, (start, end) in spans.items():
+        if option_path in patched:
+            new_start = _shift(start, edits)
+            new_spans[option_path] = (new_start, new_start + len(json.dumps(values[option_path]).encode('utf-8')))
+        elif not any(patch_start <= start and end <= patch_end for patch_start, patch_end in patched.values()):
+            # Spans inside a replaced value are gone; enclosing ones grow or shrink with it
+            new_spans[option_path] = (_shift(start, edits), _shift(end, edits))
+
+    try:
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    record_spans(path, _file_fingerprint(os.stat(path)), new_spans)
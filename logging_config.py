@@ -1,11 +1,19 @@
 import logging
+import os
+from logging.handlers import RotatingFileHandler
 
-def setup_logging():
+# e.g. SERVERCONFIG_LOG_LEVEL=INFO to also log load summaries and reloads
+LOG_LEVEL_ENV = "SERVERCONFIG_LOG_LEVEL"
+DEFAULT_LOG_LEVEL = "WARNING"
+
+def setup_logging(level=None):
+    level = level or os.environ.get(LOG_LEVEL_ENV, DEFAULT_LOG_LEVEL).upper()
     logging.basicConfig(
-        level=logging.ERROR,  # Change log level to ERROR
+        level=getattr(logging, level, logging.WARNING),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler("error.log", mode='w'),  # Overwrite existing log file
+            # Appended to and rotated, so the log of a previous run is still there after a restart
+            RotatingFileHandler("error.log", maxBytes=1024 * 1024, backupCount=3, encoding='utf-8'),
             logging.StreamHandler()
         ]
     )
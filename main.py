@@ -5,105 +5,156 @@ from tkinter import messagebox, filedialog, ttk
 import logging
 import json
 
-from resource_util import resource_path, get_base_directory, load_metadata, create_lookup_table
+from resource_util import resource_path, get_base_directory, get_setting, load_metadata, create_lookup_table, compile_option_paths, create_search_index
 from config_manager import ConfigManager
-from config_util import load_file_content, save_config
-from ui_util import update_ui_from_config, toggle_option, create_ui_components, create_grouped_ui, create_tooltip
+from config_loader import ConfigLoader, get_streamed_paths, initialize_directories, report_load_failures
+from config_cache import ConfigCache
+from file_monitor import FileMonitor
+from preset_util import create_preset, is_sparse_preset, get_preset_files
+from preset_library import PresetLibrary
+from config_diff import MISSING, apply_entries, format_value
+from edit_history import EditHistory
+from bulk_options import FileIndex, create_bulk_options, expand_file_patterns, get_file_patterns
+from config_util import DEFAULT_OUTPUT_FORMAT, load_file_content, save_config, scan_directory
+from ui_util import set_variable_value, toggle_option, create_grouped_ui, create_tooltip, create_splash, update_splash, create_diff_dialog, create_preset_browser, create_search_bar, reveal_widget
 from logging_config import setup_logging
-from error_reporting import report_error
+from perf_trace import enable_tracing, span, trace_requested
+from error_reporting import report_error, report_warning
 
 setup_logging()
 
 logger = logging.getLogger(__name__)
 
-def scan_directory(directory, extension=".json"):
-    """Scan the directory for files with a given extension."""
-    try:
-        return {
-            os.path.relpath(os.path.join(root, file), directory): os.path.join(root, file)
-            for root, _, files in os.walk(directory)
-            for file in files if file.endswith(extension)
-        }
-    except Exception as e:
-        report_error(f"Error scanning directory {directory}", e)
-        return {}
-
-def save_template(config_files, config_data, presets_dir):
-    """Save a template of the current configuration data to a JSON file."""
+def save_template(config_files, config_data, presets_dir, loader, lookup_table):
+    """Save the current value of every metadata option as a sparse preset."""
     try:
         template_filename = filedialog.asksaveasfilename(
             initialdir=presets_dir, defaultextension=".json", filetypes=[("JSON files", "*.json")]
         )
         if template_filename:
-            template_data = {filename: config_data[filename] for filename in config_files}
-            if save_config(template_filename, template_data):
+            with span("save_preset") as preset_span:
+                # Tabs that were never opened have not loaded their files yet
+                loader.ensure_loaded(filename for filename in set(lookup_table.values()) if filename in config_files)
+                template_data = create_preset(config_files, config_data, lookup_table)
+                saved = save_config(template_filename, template_data)
+                if saved:
+                    preset_span.set(bytes=os.path.getsize(template_filename), options=sum(len(options) for options in template_data["options"].values()))
+            if saved:
                 messagebox.showinfo("Info", "Template saved successfully!")
     except Exception as e:
         report_error("Error saving template", e)
 
-def load_template(config_files, config_data, ui_vars, presets_dir):
-    """Load a template from a JSON file."""
+def open_preset_browser(root, library, config_files, config_data, ui_vars, presets_dir, config_manager, loader):
+    """Show the indexed presets; only presets added or changed since the last look are read."""
     try:
-        template_filename = filedialog.askopenfilename(
-            initialdir=presets_dir, filetypes=[("JSON files", "*.json")]
-        )
-        if template_filename:
-            template_data = load_file_content(template_filename)
-            if template_data:
-                for filename in config_files:
-                    if filename in template_data:
-                        config_data[filename] = template_data[filename]
-                        update_ui_from_config(filename, ui_vars, config_data)
-                messagebox.showinfo("Info", "Template loaded successfully! - Don't Forget to APPLY!")
+        library.refresh()
+        load = lambda template_filename=None: load_template(root, config_files, config_data, ui_vars, presets_dir, config_manager, loader, template_filename)
+        create_preset_browser(root, library.list, lambda entry: load(library.full_path(entry)), load)
     except Exception as e:
-        report_error("Error loading template", e)
+        report_error("Error listing presets", e)
 
-def initialize_directories(base_directory):
-    """Initialize the required directories."""
+def load_template(root, config_files, config_data, ui_vars, presets_dir, config_manager, loader, template_filename=None):
+    """Load a sparse or legacy full-file preset and show what it would change before anything is applied.
+
+    Asks for the file when template_filename is not given.
+    """
     try:
-        CONFIG_DIR = os.path.join(base_directory, 'SPT_Data', 'Server', 'configs')
-        DATABASE_DIR = os.path.join(base_directory, 'SPT_Data', 'Server', 'database')
-        PRESETS_DIR = os.path.join(base_directory, 'user/mods/turtles-serverconfig/presets')
-        return CONFIG_DIR, DATABASE_DIR, PRESETS_DIR
+        if template_filename is None:
+            template_filename = filedialog.askopenfilename(
+                initialdir=presets_dir, filetypes=[("JSON files", "*.json")]
+            )
+        if template_filename:
+            with span("load_preset", bytes=os.path.getsize(template_filename)) as preset_span:
+                template_data = load_file_content(template_filename)
+                if not template_data:
+                    return
+                preset_files = [filename for filename in get_preset_files(template_data) if filename in config_files]
+                loader.ensure_loaded(preset_files)
+                if not is_sparse_preset(template_data):
+                    # A legacy preset holds whole files, so it is compared against whole files
+                    loader.load_full(preset_files)
+
+                def current_value(filename, option_path):
+                    # Unapplied edits are compared as shown in the UI, not as stored in the tree
+                    var = ui_vars.get(filename, {}).get(option_path)
+                    if var is None or option_path not in config_manager.dirty_options.get(filename, ()):
+                        return MISSING
+                    return var.get()
+
+                entries = config_manager.diff_preset(template_data, config_files, current_value)
+                preset_span.set(options=len(entries))
+            if not entries:
+                messagebox.showinfo("Info", "The preset matches the current settings; nothing to load.")
+                return
+            rows = [(entry.tab, entry.relative_path, entry.label, format_value(entry.old), format_value(entry.new)) for entry in entries]
+            create_diff_dialog(root, rows, lambda indexes: apply_template_changes([entries[index] for index in indexes], config_data, ui_vars, config_manager, root.history))
     except Exception as e:
-        report_error("Error initializing directories", e)
-        return None, None, None
+        report_error("Error loading template", e)
 
-def load_all_config_files(required_files, base_directory):
-    """Load only the required configuration files."""
+def apply_template_changes(entries, config_data, ui_vars, config_manager, history):
+    """Copy the preset changes picked in the diff dialog into config_data and the UI, as one undoable edit."""
     try:
-        config_data = {}
-        for relative_path in required_files:
-            full_path = os.path.join(base_directory, 'SPT_Data', 'Server', relative_path)
-            try:
-                config_data[relative_path] = load_file_content(full_path)
-                if config_data[relative_path] is None:
-                    raise FileNotFoundError(f"File not found or failed to load: {relative_path}")
-            except FileNotFoundError as e:
-                logger.error(f"Failed to load configuration file: {relative_path}. It may be missing or misspelled.")
-                messagebox.showwarning("Warning", f"Failed to load configuration file: {relative_path}. It may be missing or misspelled.")
-        return config_data
+        if not entries:
+            return
+        with history.group("Load preset"):
+            for entry in entries:
+                history.watch(entry.relative_path, entry.option_path, entry.keys)
+            apply_entries(entries, config_data)
+            for entry in entries:
+                if entry.option_path is None:
+                    # Not an option, so the file cannot be patched and is written in full
+                    config_manager.mark_file_dirty(entry.relative_path)
+                    continue
+                var = ui_vars.get(entry.relative_path, {}).get(entry.option_path)
+                if var is not None:
+                    set_variable_value(var, entry.new)
+                config_manager.mark_dirty(entry.relative_path, entry.option_path)
+        messagebox.showinfo("Info", f"{len(entries)} preset change(s) loaded! - Don't Forget to APPLY!")
     except Exception as e:
-        report_error("Error loading all config files", e)
-        return {}
+        report_error("Error loading template", e)
 
-def create_main_ui(metadata, all_config_files, config_data, ui_vars, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table):
-    """Create the main user interface."""
+def group_tab_options(files):
+    """Group the options of one metadata tab by their "group" field."""
+    group_options = {}
+    for filename, options in files.items():
+        for option, meta in options.items():
+            group_name = meta.get("group", "General")
+            group_options.setdefault(group_name, {})[option] = meta
+    return group_options
+
+def create_main_ui(metadata, all_config_files, loader, ui_vars, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table, search_index, pattern_files=None):
+    """Create the main user interface, loading and building each tab the first time it is selected."""
     try:
+        config_data = loader.config_data
+        pattern_files = pattern_files or {}
         root = tk.Tk()
+        root.withdraw()
         root.title("Turtles Server Config")
-        root.grid_rowconfigure(0, weight=1)
+        root.grid_rowconfigure(1, weight=1)
         root.grid_columnconfigure(0, weight=1)
 
+        search_frame = tk.Frame(root)
+        search_frame.grid(row=0, column=0, pady=(5, 0), padx=10, sticky="ew")
         main_frame = tk.Frame(root)
-        main_frame.grid(row=0, column=0, sticky="nsew")
+        main_frame.grid(row=1, column=0, sticky="nsew")
 
         canvas = tk.Canvas(main_frame)
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
         scrollable_frame = ttk.Frame(canvas)
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        # Building or collapsing a group fires a <Configure> per widget; measure once they settle
+        region_pending = []
+
+        def update_scroll_region():
+            region_pending.clear()
+            canvas.configure(scrollregion=canvas.bbox("all"))
+
+        def schedule_scroll_region(event=None):
+            if not region_pending:
+                region_pending.append(canvas.after_idle(update_scroll_region))
+
+        scrollable_frame.bind("<Configure>", schedule_scroll_region)
 
         notebook_frame = tk.Frame(scrollable_frame)
         notebook_frame.pack(expand=True)
@@ -111,28 +162,133 @@ def create_main_ui(metadata, all_config_files, config_data, ui_vars, base_direct
         notebook = ttk.Notebook(notebook_frame)
         notebook.pack(pady=10, padx=10)
 
-        for tab, files in metadata.items():
-            group_options = {}
-            for filename, options in files.items():
-                for option, meta in options.items():
-                    group_name = meta.get("group", "General")
-                    group_options.setdefault(group_name, {})[option] = meta
+        # Created before the tabs so that every UI variable reports its edits to it
+        output_format = get_setting("output_format", DEFAULT_OUTPUT_FORMAT)
+        config_manager = ConfigManager(all_config_files, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, lookup_table, output_format)
+        root.config_manager = config_manager  # Attach config_manager to root for access in on_exit
 
-            create_grouped_ui(tab, group_options, notebook, filename, config_data, ui_vars, toggle_option, lookup_table)
+        # Picks up edits made to loaded files by other programs while the app is open
+        file_monitor = FileMonitor(loader, config_manager, ui_vars, lookup_table)
+        config_manager.file_monitor = file_monitor
+        file_monitor.start(root)
+
+        # Edits, toggles and preset loads are undone with Ctrl+Z and redone with Ctrl+Y / Ctrl+Shift+Z
+        history = EditHistory(config_data, ui_vars, config_manager)
+        root.history = history
+
+        def on_change(filename, option_path):
+            history.record_var(filename, option_path)
+            config_manager.mark_dirty(filename, option_path)
+
+        def toggle(option_path, filename, config_data, ui_vars):
+            with history.group(f"Toggle {option_path}", extend_option=(filename, option_path)):
+                history.watch(filename, option_path)
+                toggle_option(option_path, filename, config_data, ui_vars)
+
+        # Every tab is added up front to keep the metadata order, but a tab's files
+        # are only loaded and its widgets built the first time it is selected.
+        pending_tabs = {}
+        tab_frames = {}
+        # Built widget of every option, for jumping to search results
+        option_widgets = {}
+        requested_tabs = set()
+        reported_failures = set()
+        tab_names = {}
+        for tab in metadata:
+            tab_frame = ttk.Frame(notebook)
+            notebook.add(tab_frame, text=tab)
+            pending_tabs[tab] = tab_frame
+            tab_frames[tab] = tab_frame
+            tab_names[str(tab_frame)] = tab
 
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
-        create_controls(root, all_config_files, ui_vars, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table)
-
-        root.update_idletasks()
-        tabs_width = sum(notebook.nametowidget(tab).winfo_width() for tab in notebook.tabs()) + 20
-        window_width, window_height = tabs_width, 600
-        screen_width, screen_height = root.winfo_screenwidth(), root.winfo_screenheight()
-        position_top, position_right = int(screen_height / 2 - window_height / 2), int(screen_width / 2 - window_width / 2)
-
-        root.geometry(f"{window_width}x{window_height}+{position_right}+{position_top}")
-        notebook_frame.pack(anchor="center")
+        create_controls(root, config_manager, loader, all_config_files, ui_vars, config_data, PRESETS_DIR)
+
+        def get_tab_files(tab):
+            files = []
+            for filename in metadata[tab]:
+                if filename in pattern_files:
+                    files.extend(pattern_files[filename])
+                elif filename in all_config_files:
+                    files.append(filename)
+            return files
+
+        def show_window():
+            root.update_idletasks()
+            tabs_width = sum(notebook.nametowidget(tab).winfo_width() for tab in notebook.tabs()) + 20
+            window_width, window_height = tabs_width, 600
+            screen_width, screen_height = root.winfo_screenwidth(), root.winfo_screenheight()
+            position_top, position_right = int(screen_height / 2 - window_height / 2), int(screen_width / 2 - window_width / 2)
+
+            root.geometry(f"{window_width}x{window_height}+{position_right}+{position_top}")
+            notebook_frame.pack(anchor="center")
+            root.deiconify()
+
+        def poll_loader():
+            try:
+                for relative_path in loader.collect():
+                    if splash.winfo_exists():
+                        update_splash(splash, *loader.progress(), relative_path)
+
+                for tab in [tab for tab in requested_tabs if tab in pending_tabs]:
+                    if loader.is_ready(get_tab_files(tab)):
+                        tab_frame = pending_tabs.pop(tab)
+                        for child in tab_frame.winfo_children():
+                            child.destroy()
+                        with span("build_tab", tab=tab, options=sum(len(options) for options in metadata[tab].values())):
+                            # Pattern options are shown with what they cover; the metadata itself is left as is
+                            tab_files = {filename: create_bulk_options(filename, options, pattern_files[filename], config_data, config_manager.bulk_options)
+                                         if filename in pattern_files else options for filename, options in metadata[tab].items()}
+                            create_grouped_ui(tab, group_tab_options(tab_files), notebook, None, config_data, ui_vars, toggle, lookup_table, on_change, tab_frame, option_widgets)
+                        new_failures = {filename: loader.failures[filename] for filename in get_tab_files(tab) if filename in loader.failures and filename not in reported_failures}
+                        reported_failures.update(new_failures)
+                        report_load_failures(new_failures)
+
+                if splash.winfo_exists() and not any(tab in pending_tabs for tab in requested_tabs):
+                    logger.info(f"Startup: {loader.summary()}")
+                    splash.destroy()
+                    show_window()
+
+                if any(tab in pending_tabs for tab in requested_tabs):
+                    root.after(50, poll_loader)
+            except Exception as e:
+                report_error("Error loading configuration files", e)
+
+        def open_tab(tab):
+            """Start loading a tab's files; poll_loader builds its widgets once they are ready."""
+            if tab not in pending_tabs or tab in requested_tabs:
+                return
+            polling = any(tab in pending_tabs for tab in requested_tabs)
+            requested_tabs.add(tab)
+            ttk.Label(pending_tabs[tab], text="Loading...").pack(padx=20, pady=20)
+            loader.submit(get_tab_files(tab))
+            if not polling:
+                poll_loader()
+
+        notebook.bind("<<NotebookTabChanged>>", lambda e: open_tab(tab_names.get(notebook.select())))
+        def reveal_option(result, attempts=100):
+            """Switch to a search result's tab and scroll to its widget, waiting for the tab to load if needed."""
+            tab, filename, option_path, _ = result
+            if notebook.select() != str(tab_frames[tab]):
+                notebook.select(tab_frames[tab])
+            widget = option_widgets.get((filename, option_path))
+            if widget is not None:
+                reveal_widget(canvas, scrollable_frame, widget)
+            elif tab in pending_tabs and attempts:
+                root.after(100, lambda: reveal_option(result, attempts - 1))
+
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        search_entry = create_search_bar(search_frame, search_index.search, reveal_option)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        create_tooltip(search_entry, "Find an option by name, description, group or path.")
+
+        splash = create_splash(root, len(get_tab_files(next(iter(metadata)))) if metadata else 0)
+        if metadata:
+            open_tab(next(iter(metadata)))
+        else:
+            poll_loader()
 
         # Bind the window close event to the custom handler
         root.protocol("WM_DELETE_WINDOW", lambda: on_exit(root, ui_vars, config_data, CONFIG_DIR, DATABASE_DIR, lookup_table))
@@ -141,11 +297,11 @@ def create_main_ui(metadata, all_config_files, config_data, ui_vars, base_direct
     except Exception as e:
         report_error("Error creating main UI", e)
 
-def create_controls(root, all_config_files, ui_vars, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table):
+def create_controls(root, config_manager, loader, all_config_files, ui_vars, config_data, PRESETS_DIR):
     """Create the control buttons for applying changes and saving/loading templates."""
     try:
         control_frame = tk.Frame(root)
-        control_frame.grid(row=1, column=0, pady=5, padx=10, sticky="ew")
+        control_frame.grid(row=2, column=0, pady=5, padx=10, sticky="ew")
         buttons_frame = tk.Frame(control_frame)
         buttons_frame.pack(anchor="center")
 
@@ -155,29 +311,61 @@ def create_controls(root, all_config_files, ui_vars, config_data, metadata, base
             create_tooltip(button, tooltip)
             return button
 
-        # Create an instance of ConfigManager
-        config_manager = ConfigManager(all_config_files, config_data, metadata, base_directory, CONFIG_DIR, DATABASE_DIR, lookup_table)
-        root.config_manager = config_manager  # Attach config_manager to root for access in on_exit
-
-        create_button("Apply Changes", lambda: config_manager.apply_changes(ui_vars), "Apply the changes to the configuration files.")
-        create_button("Save Preset", lambda: save_template(all_config_files, config_data, PRESETS_DIR), "Save the current configuration as a preset.")
-        create_button("Load Preset", lambda: load_template(all_config_files, config_data, ui_vars, PRESETS_DIR), "Load a configuration preset.")
+        create_button("Apply Changes", lambda: config_manager.apply_changes_async(root, ui_vars), "Apply the changes to the configuration files.")
+        create_button("Save Preset", lambda: save_template(all_config_files, config_data, PRESETS_DIR, loader, config_manager.lookup_table), "Save the current configuration as a preset.")
+        library = PresetLibrary(PRESETS_DIR, config_manager.lookup_table)
+        create_button("Load Preset", lambda: open_preset_browser(root, library, all_config_files, config_data, ui_vars, PRESETS_DIR, config_manager, loader), "Browse, preview and load a configuration preset.")
+
+        # The bindings are global, so they also fire while the modal apply dialog has the focus;
+        # the trees must not change while they are being written.
+        def undo(event=None):
+            if config_manager.apply_thread is not None or root.history.undo() is None:
+                root.bell()
+            return "break"
+
+        def redo(event=None):
+            if config_manager.apply_thread is not None or root.history.redo() is None:
+                root.bell()
+            return "break"
+
+        create_button("Undo", undo, "Undo the last edit, toggle or preset load (Ctrl+Z).")
+        create_button("Redo", redo, "Redo the last undone change (Ctrl+Y or Ctrl+Shift+Z).")
+        # Caps Lock turns the keysyms uppercase without Shift, so both cases are bound;
+        # Tk picks the Shift bindings over the plain ones when Shift is held.
+        for sequence in ("<Control-z>", "<Control-Z>"):
+            root.bind_all(sequence, undo)
+        for sequence in ("<Control-y>", "<Control-Y>", "<Control-Shift-z>", "<Control-Shift-Z>"):
+            root.bind_all(sequence, redo)
     except Exception as e:
         report_error("Error creating controls", e)
 
 def on_exit(root, ui_vars, config_data, CONFIG_DIR, DATABASE_DIR, lookup_table):
     """Handle the window close event."""
+    config_manager = root.config_manager  # Use the same instance of ConfigManager
+    if config_manager.apply_thread is not None:
+        # Let the running apply finish writing, then ask again
+        if not getattr(root, "exit_requested", False):
+            root.exit_requested = True
+            config_manager.when_applied(lambda: on_exit(root, ui_vars, config_data, CONFIG_DIR, DATABASE_DIR, lookup_table))
+        return
+    root.exit_requested = False
     result = messagebox.askyesnocancel("Exit", "Do you want to apply current settings before exiting?")
     if result is None:
         return  # Cancel, do nothing
     elif result:
-        config_manager = root.config_manager  # Use the same instance of ConfigManager
-        config_manager.apply_changes(ui_vars)
-    root.destroy()
+        config_manager.apply_changes_async(root, ui_vars)
+        # Files that failed, were invalid or were cancelled keep their changes pending; stay open for them
+        config_manager.when_applied(lambda: None if config_manager.pending_files() else root.destroy())
+    else:
+        root.destroy()
 
 if __name__ == "__main__":
     try:
-        base_directory = get_base_directory()
+        if trace_requested(sys.argv[1:]):
+            enable_tracing()
+
+        with span("resolve_directory"):
+            base_directory = get_base_directory()
         if not base_directory:
             logger.error("Base directory not set. Exiting.")
             messagebox.showerror("Error", "Base directory not set. Exiting.")
@@ -191,18 +379,42 @@ if __name__ == "__main__":
             messagebox.showerror("Error", "Failed to load required files list.")
             sys.exit()
 
-        config_data = load_all_config_files(required_files, base_directory)
-
         metadata = load_file_content(resource_path(os.path.join('src', 'metadata.json')))
         if metadata is None:
             logger.error("Failed to load metadata file.")
             messagebox.showerror("Error", "Failed to load metadata file.")
             sys.exit()
 
-        ui_vars = {relative_path: {} for relative_path in required_files if relative_path in config_data}
-
-        lookup_table = create_lookup_table(metadata)
-
-        create_main_ui(metadata, required_files, config_data, ui_vars, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table)
+        with span("build_lookup_table") as lookup_span:
+            lookup_table = create_lookup_table(metadata)
+            compile_option_paths(metadata)
+            search_index = create_search_index(metadata)
+            lookup_span.set(options=len(lookup_table))
+
+        # A metadata entry may name a file pattern such as database/bots/types/*.json;
+        # it is matched against an index of the server files scanned once here.
+        pattern_files = {}
+        if get_file_patterns(metadata):
+            with span("index_files") as index_span:
+                file_index = FileIndex(scan_directory(os.path.join(base_directory, 'SPT_Data', 'Server')))
+                pattern_files = expand_file_patterns(metadata, file_index)
+                index_span.set(files=len(file_index), matched=sum(len(files) for files in pattern_files.values()))
+            required_files = list(dict.fromkeys(required_files + [relative_path for files in pattern_files.values() for relative_path in files]))
+
+        # Files are parsed in the background as their tabs are first opened,
+        # from the on-disk cache when they have not changed since the last run.
+        # Only the metadata options are extracted from the large database files,
+        # except from files matched by a pattern, whose keys have to be walked.
+        streamed_paths = get_streamed_paths(lookup_table)
+        for pattern, files in pattern_files.items():
+            for relative_path in [pattern] + files:
+                streamed_paths.pop(relative_path, None)
+        cache = ConfigCache()
+        loader = ConfigLoader(base_directory, cache=cache, streamed_paths=streamed_paths)
+        loader.executor.submit(cache.prune)
+
+        ui_vars = {relative_path: {} for relative_path in required_files + list(pattern_files)}
+
+        create_main_ui(metadata, required_files, loader, ui_vars, base_directory, CONFIG_DIR, DATABASE_DIR, PRESETS_DIR, lookup_table, search_index, pattern_files)
     except Exception as e:
         report_error("Error during main execution", e)
@@ -0,0 +1,124 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tracing is off unless this variable is set to a non-empty value other than "0",
+# or the app is started with --trace.
+TRACE_ENV = "SERVERCONFIG_TRACE"
+TRACE_LOG = "trace.log"
+TRACE_DIR = "traces"
+
+_enabled = False
+_events: List[Dict[str, Any]] = []
+_origin = time.perf_counter()
+_trace_path: Optional[str] = None
+# Spans go to their own logger, so they reach trace.log whatever the main log level is
+_span_logger = logging.getLogger("perf_trace.spans")
+
+def trace_requested(argv=None) -> bool:
+    """Return True if tracing was asked for through the environment or a --trace argument."""
+    if os.environ.get(TRACE_ENV, "") not in ("", "0"):
+        return True
+    return argv is not None and "--trace" in argv
+
+def enable_tracing(trace_dir: str = TRACE_DIR, log_path: str = TRACE_LOG) -> str:
+    """Start recording spans; return the Chrome trace file written at exit."""
+    global _enabled, _trace_path
+    if _enabled:
+        return _trace_path
+    handler = RotatingFileHandler(log_path, maxBytes=2 * 1024 * 1024, backupCount=3, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    _span_logger.addHandler(handler)
+    _span_logger.setLevel(logging.INFO)
+    _span_logger.propagate = False
+    os.makedirs(trace_dir, exist_ok=True)
+    _trace_path = os.path.join(trace_dir, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    _enabled = True
+    atexit.register(write_trace)
+    logger.info(f"Performance tracing enabled; writing {log_path} and {_trace_path}")
+    return _trace_path
+
+def is_enabled() -> bool:
+    return _enabled
+
+class Span:
+    """One timed phase; extra fields such as bytes and options are attached with set()."""
+    __slots__ = ("name", "args", "start", "thread", "ended")
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.thread = threading.current_thread()
+        self.start = time.perf_counter()
+        self.ended = False
+
+    def set(self, **args) -> "Span":
+        self.args.update(args)
+        return self
+
+    def end(self) -> None:
+        if self.ended:
+            return
+        self.ended = True
+        seconds = time.perf_counter() - self.start
+        _events.append({
+            "name": self.name, "ph": "X", "pid": os.getpid(), "tid": self.thread.ident,
+            "ts": round((self.start - _origin) * 1e6), "dur": round(seconds * 1e6),
+            "args": self.args, "thread": self.thread.name,
+        })
+        _span_logger.info(json.dumps({"span": self.name, "seconds": round(seconds, 6), "thread": self.thread.name, **self.args}, default=str))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+        return False
+
+class _NoSpan:
+    """Returned while tracing is off, so instrumented code costs almost nothing."""
+    __slots__ = ()
+
+    def set(self, **args):
+        return self
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str, **args):
+    """Time a phase: use as a context manager, or call end() when it finishes elsewhere."""
+    return Span(name, args) if _enabled else _NO_SPAN
+
+def write_trace(path: Optional[str] = None) -> Optional[str]:
+    """Write the recorded spans as a Chrome trace (chrome://tracing or Perfetto)."""
+    path = path or _trace_path
+    if path is None:
+        return None
+    events = [dict(event) for event in _events]
+    threads = {(event["pid"], event["tid"]): event.pop("thread") for event in events}
+    metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for (pid, tid), name in threads.items()]
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, default=str)
+    except OSError as e:
+        logger.error(f"Could not write trace file {path}: {e}")
+        return None
+    return path
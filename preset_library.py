@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from config_cache import CACHE_DIR
+from config_diff import MISSING, format_value, get_value
+from config_util import read_config, scan_directory, write_config
+from perf_trace import span
+from preset_util import is_sparse_preset
+from resource_util import get_option_path
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "preset_index.json"
+INDEX_FORMAT = 2
+# Option values kept per preset for its preview
+SUMMARY_LIMIT = 25
+
+def get_metadata_digest(lookup_table: Dict[str, str]) -> str:
+    """Identify the metadata options a summary was made for; legacy preset summaries depend on them."""
+    return hashlib.sha1(json.dumps(sorted(lookup_table.items())).encode('utf-8')).hexdigest()
+
+def summarize_preset(preset_data: Any, file_options: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Return the files a preset covers, every option path it sets (for filtering) and the values of the first few.
+
+    Legacy presets hold whole files, so their summary lists the metadata options found in them.
+    """
+    summary, option_paths = [], []
+    if is_sparse_preset(preset_data):
+        files = sorted(preset_data["options"])
+        for filename in files:
+            for option_path, value in preset_data["options"][filename].items():
+                option_paths.append(option_path)
+                if len(summary) < SUMMARY_LIMIT:
+                    summary.append([filename, option_path, format_value(value, 40)])
+        return {"version": preset_data["version"], "files": files, "options": len(option_paths), "option_paths": option_paths, "summary": summary}
+    if not isinstance(preset_data, dict):
+        raise ValueError("not a preset: expected a JSON object")
+    files = sorted(preset_data)
+    for filename in files:
+        for option_path in file_options.get(filename, ()):
+            value = get_value(preset_data[filename], get_option_path(option_path).keys)
+            if value is MISSING:
+                continue
+            option_paths.append(option_path)
+            if len(summary) < SUMMARY_LIMIT:
+                summary.append([filename, option_path, format_value(value, 40)])
+    return {"version": 1, "files": files, "options": len(option_paths), "option_paths": option_paths, "summary": summary}
+
+class PresetLibrary:
+    """An index of the presets directory with a preview of every preset, kept in the config cache.
+
+    refresh() only parses presets whose size or mtime changed since they were
+    indexed, so listing and filtering a large collection does not read the presets.
+    """
+
+    def __init__(self, presets_dir: str, lookup_table: Dict[str, str], index_path: Optional[str] = None):
+        self.presets_dir = presets_dir
+        self.index_path = index_path or os.path.join(CACHE_DIR, INDEX_FILE)
+        self.file_options: Dict[str, List[str]] = {}
+        for option_path, filename in lookup_table.items():
+            self.file_options.setdefault(filename, []).append(option_path)
+        self.digest = get_metadata_digest(lookup_table)
+        self.entries: Dict[str, Dict[str, Any]] = self.load_index()
+        # Lowercase text every filter word is looked up in, per preset
+        self.search_text: Dict[str, str] = {}
+
+    def load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            index = read_config(self.index_path)
+        except (OSError, ValueError):
+            return {}
+        if (not isinstance(index, dict) or index.get("format") != INDEX_FORMAT or index.get("metadata") != self.digest
+                or index.get("presets_dir") != os.path.abspath(self.presets_dir)):
+            return {}
+        return index.get("presets", {})
+
+    def save_index(self) -> None:
+        index = {"format": INDEX_FORMAT, "metadata": self.digest, "presets_dir": os.path.abspath(self.presets_dir), "presets": self.entries}
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            write_config(self.index_path, index, "compact")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Could not save the preset index {self.index_path}: {e}")
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the presets directory; return how many presets were (re)indexed."""
+        with span("preset_index") as index_span:
+            found = scan_directory(self.presets_dir) if os.path.isdir(self.presets_dir) else {}
+            parsed = 0
+            removed = [name for name in self.entries if name not in found]
+            for name in removed:
+                del self.entries[name]
+                self.search_text.pop(name, None)
+            for name, full_path in found.items():
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                entry = self.entries.get(name)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                parsed += 1
+                entry = {"name": name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                try:
+                    entry.update(summarize_preset(read_config(full_path), self.file_options))
+                except (OSError, ValueError, TypeError, AttributeError) as e:
+                    logger.error(f"Could not index preset {full_path}: {e}")
+                    entry.update({"version": None, "files": [], "options": 0, "option_paths": [], "summary": [], "error": str(e)})
+                self.entries[name] = entry
+                self.search_text.pop(name, None)
+            if parsed or removed:
+                self.save_index()
+            index_span.set(presets=len(self.entries), parsed=parsed, removed=len(removed))
+        return parsed
+
+    def get_search_text(self, name: str) -> str:
+        text = self.search_text.get(name)
+        if text is None:
+            entry = self.entries[name]
+            words = [name] + entry["files"] + entry["option_paths"]
+            text = self.search_text[name] = "\n".join(words).lower()
+        return text
+
+    def list(self, query: str = "") -> List[Dict[str, Any]]:
+        """Return the indexed presets whose name, files or option paths contain every word of query, by name."""
+        words = query.lower().split()
+        return [self.entries[name] for name in sorted(self.entries, key=str.lower)
+                if all(word in self.get_search_text(name) for word in words)]
+
+    def full_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.presets_dir, *entry["name"].split("/"))
@@ -0,0 +1,84 @@
+import logging
+from typing import Any, Dict, List, Optional
+from resource_util import get_option_path, invalidate_option_paths
+from ui_util import set_variable_value, update_ui_from_config
+
+logger = logging.getLogger(__name__)
+
+# Version 2 presets only store the option paths listed in metadata.json:
+#   {"version": 2, "options": {"configs/airdrop.json": {"airdropChancePercent.bigmap": 25}}}
+# Version 1 (legacy) presets map each file name to its whole parsed content.
+PRESET_VERSION = 2
+
+def is_sparse_preset(preset_data: Any) -> bool:
+    return isinstance(preset_data, dict) and "version" in preset_data and isinstance(preset_data.get("options"), dict)
+
+def get_preset_files(preset_data: Dict[str, Any]) -> List[str]:
+    """Return the config files a preset touches."""
+    if is_sparse_preset(preset_data):
+        return list(preset_data["options"])
+    return list(preset_data)
+
+def create_preset(config_files: List[str], config_data: Dict[str, Any], lookup_table: Dict[str, str]) -> Dict[str, Any]:
+    """Build a sparse preset holding the current value of every metadata option."""
+    options = {}
+    for option_path, filename in lookup_table.items():
+        if filename not in config_files or config_data.get(filename) is None:
+            continue
+        try:
+            value = get_option_path(option_path).get(config_data[filename])
+        except (KeyError, IndexError, ValueError, TypeError):
+            logger.error(f"Option {option_path} not found in {filename}; it is left out of the preset.")
+            continue
+        options.setdefault(filename, {})[option_path] = value
+    return {"version": PRESET_VERSION, "options": options}
+
+def apply_preset(preset_data: Dict[str, Any], config_files: List[str], config_data: Dict[str, Any], ui_vars: Dict[str, Any], schema=None) -> Dict[str, Optional[List[str]]]:
+    """Apply a preset to config_data and the matching UI variables.
+
+    Returns the files it changed, each with its changed option paths (None for
+    a whole file replaced by a legacy preset). UI variables are always reset to
+    the preset's values, even where config_data already held them.
+
+    Sparse presets patch single option paths into the loaded trees, so the
+    files they name must already be in config_data. With a schema, both values
+    are coerced before they are compared, so "25" in a preset does not change
+    a 25 in the file. Legacy presets replace whole file trees.
+    """
+    def coerce(filename, option_path, value):
+        if schema is None:
+            return value
+        coerced, errors = schema.validate(filename, {option_path: value})
+        return value if errors else coerced[option_path]
+
+    changed_files = {}
+    if is_sparse_preset(preset_data):
+        for filename, options in preset_data["options"].items():
+            if filename not in config_files or config_data.get(filename) is None:
+                logger.error(f"Preset file {filename} is not loaded; its options were skipped.")
+                continue
+            file_vars = ui_vars.get(filename, {})
+            changed = []
+            for option_path, value in options.items():
+                accessor = get_option_path(option_path)
+                value = coerce(filename, option_path, value)
+                try:
+                    current = coerce(filename, option_path, accessor.get(config_data[filename]))
+                    if current != value or type(current) is not type(value):
+                        accessor.set(config_data[filename], value)
+                        changed.append(option_path)
+                except (KeyError, IndexError, ValueError, TypeError):
+                    logger.error(f"Option {option_path} not found in {filename}; it was skipped.")
+                    continue
+                if option_path in file_vars:
+                    set_variable_value(file_vars[option_path], value)
+            if changed:
+                changed_files[filename] = changed
+    else:
+        invalidate_option_paths()
+        for filename in config_files:
+            if filename in preset_data:
+                config_data[filename] = preset_data[filename]
+                update_ui_from_config(filename, ui_vars, config_data)
+                changed_files[filename] = None
+    return changed_files
@@ -1,9 +1,11 @@
+import bisect
 import json
 import os
+import re
 import sys
 import logging
 from tkinter import filedialog, messagebox
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from error_reporting import report_error
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,16 @@ def get_base_directory() -> Optional[str]:
         report_error(f"Error accessing {CONFIG_FILE}", e)
     return None
 
+def get_setting(key: str, default=None):
+    """Read an optional setting stored alongside the base directory in config_dir.json."""
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                return json.load(f).get(key, default)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error reading {key} from {CONFIG_FILE}: {e}")
+    return default
+
 def create_lookup_table(metadata: dict) -> dict:
     lookup_table = {}
     for category, files in metadata.items():
@@ -46,6 +58,158 @@ def create_lookup_table(metadata: dict) -> dict:
                 lookup_table[option_path] = filename
     return lookup_table
 
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words, also breaking camelCase, dots and underscores."""
+    return [word.lower() for word in _WORD.findall(text or "")]
+
+class SearchIndex:
+    """Inverted index over the metadata options for search-as-you-type.
+
+    Every query word must match a word of the option's path, display name,
+    description, group or tab, either fully or as a prefix.
+    """
+
+    # A match in the display name counts more than one in the description
+    FIELD_WEIGHTS = (("displayName", 8), ("path", 4), ("group", 2), ("tab", 2), ("description", 1))
+
+    def __init__(self):
+        self.options: List[Tuple[str, str, str, str]] = []  # (tab, filename, option path, display name)
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.words: List[str] = []
+
+    def add(self, tab: str, filename: str, option_path: str, meta: dict) -> None:
+        option_id = len(self.options)
+        display_name = meta.get("displayName", option_path)
+        self.options.append((tab, filename, option_path, display_name))
+        fields = {"displayName": display_name, "path": option_path, "group": meta.get("group", "General"),
+                  "tab": tab, "description": meta.get("description", "")}
+        for field, weight in self.FIELD_WEIGHTS:
+            for word in tokenize(fields[field]):
+                posting = self.postings.setdefault(word, {})
+                if posting.get(option_id, 0) < weight:
+                    posting[option_id] = weight
+
+    def finish(self) -> "SearchIndex":
+        self.words = sorted(self.postings)
+        return self
+
+    def match_word(self, word: str) -> Dict[int, int]:
+        """Options containing a word that starts with word, with their best weight (exact matches count double)."""
+        matches = {}
+        start = bisect.bisect_left(self.words, word)
+        for index in range(start, len(self.words)):
+            candidate = self.words[index]
+            if not candidate.startswith(word):
+                break
+            bonus = 2 if candidate == word else 1
+            for option_id, weight in self.postings[candidate].items():
+                if matches.get(option_id, 0) < weight * bonus:
+                    matches[option_id] = weight * bonus
+        return matches
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[str, str, str, str]]:
+        """Return (tab, filename, option path, display name) of the best matches, best first."""
+        words = tokenize(query)
+        if not words:
+            return []
+        scores = None
+        # Rarest words first keeps the intersections small
+        for matches in sorted((self.match_word(word) for word in words), key=len):
+            if scores is None:
+                scores = matches
+            else:
+                scores = {option_id: score + matches[option_id] for option_id, score in scores.items() if option_id in matches}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda option_id: (-scores[option_id], self.options[option_id][3]))
+        return [self.options[option_id] for option_id in ranked[:limit]]
+
+def create_search_index(metadata: dict) -> SearchIndex:
+    """Build the option search index once, like the lookup table."""
+    index = SearchIndex()
+    for tab, files in metadata.items():
+        for filename, options in files.items():
+            for option_path, meta in options.items():
+                index.add(tab, filename, option_path, meta)
+    return index.finish()
+
+def split_option_path(option_path: str) -> tuple:
+    """Split a dotted option path into keys; a dot inside a key is written as "\\."."""
+    keys, current, chars = [], [], iter(option_path)
+    for char in chars:
+        if char == '\\':
+            current.append(next(chars, ''))
+        elif char == '.':
+            keys.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    keys.append(''.join(current))
+    return tuple(keys)
+
+class OptionPath:
+    """A metadata option path split once into keys, with its parent container cached.
+
+    The cached parent is reused while the same file tree is passed in and no
+    container on any path was replaced since; otherwise the path is walked again.
+    Numeric keys index into lists.
+    """
+    __slots__ = ("path", "keys", "_cache")
+
+    # Bumped whenever a container that option paths may walk through is replaced
+    generation = 0
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = split_option_path(path)
+        self._cache = None
+
+    @staticmethod
+    def step(container, key):
+        return container[int(key)] if isinstance(container, list) else container[key]
+
+    def parent(self, root):
+        cache = self._cache
+        if cache is not None and cache[0] is root and cache[1] == OptionPath.generation:
+            return cache[2]
+        container = root
+        for key in self.keys[:-1]:
+            container = self.step(container, key)
+        self._cache = (root, OptionPath.generation, container)
+        return container
+
+    def get(self, root):
+        return self.step(self.parent(root), self.keys[-1])
+
+    def set(self, root, value) -> None:
+        container = self.parent(root)
+        key = int(self.keys[-1]) if isinstance(container, list) else self.keys[-1]
+        if isinstance(container[key], (dict, list)):
+            invalidate_option_paths()
+        container[key] = value
+
+OPTION_PATHS: Dict[str, OptionPath] = {}
+
+def compile_option_paths(metadata: dict) -> Dict[str, OptionPath]:
+    """Compile every option path in the metadata; build this once, next to the lookup table."""
+    for files in metadata.values():
+        for options in files.values():
+            for option_path in options:
+                get_option_path(option_path)
+    return OPTION_PATHS
+
+def get_option_path(option_path: str) -> OptionPath:
+    accessor = OPTION_PATHS.get(option_path)
+    if accessor is None:
+        accessor = OPTION_PATHS[option_path] = OptionPath(option_path)
+    return accessor
+
+def invalidate_option_paths() -> None:
+    """Drop every cached parent, e.g. after a whole file tree was replaced."""
+    OptionPath.generation += 1
+
 def load_metadata(file_path: str) -> Optional[dict]:
     """Load metadata from a JSON file."""
     try:
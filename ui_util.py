@@ -1,43 +1,39 @@
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, font as tkfont
 from typing import Dict, Any
 import logging
 from error_reporting import report_error
+from resource_util import get_option_path
 
 logger = logging.getLogger(__name__)
 
-def update_ui_from_config(filename: str, ui_vars: Dict[str, Any], config_data: Dict[str, Any]) -> None:
+# Groups with more options than this are shown as a list of VIRTUAL_VISIBLE_ROWS
+# rows that reuses its widgets while scrolling, instead of one widget per option.
+VIRTUAL_THRESHOLD = 60
+VIRTUAL_VISIBLE_ROWS = 15
+
+def update_ui_from_config(filename: str, ui_vars: Dict[str, Any], config_data: Dict[str, Any], option_paths=None) -> None:
     if filename in ui_vars:
         for option_path, var in ui_vars[filename].items():
-            value = get_nested_value(config_data[filename], option_path.split('.'))
+            if option_paths is not None and option_path not in option_paths:
+                continue
+            value = get_option_path(option_path).get(config_data[filename])
             set_variable_value(var, value)
 
-def get_nested_value(data: Dict[str, Any], keys: [str]) -> Any:
-    try:
-        for key in keys:
-            data = data[key]
-        return data
-    except KeyError as e:
-        logger.error(f"KeyError accessing {'.'.join(keys)} in {data}: {e}")
-        logger.error(f"Available keys in data: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-        raise
-    except TypeError as e:
-        logger.error(f"TypeError accessing {'.'.join(keys)} in {data}: {e}")
-        raise
-
 def set_variable_value(var: tk.Variable, value: Any) -> None:
     var.set(value if isinstance(var, tk.BooleanVar) else str(value))
 
 def toggle_option(option_path: str, filename: str, config_data: Dict[str, Any], ui_vars: Dict[str, Any]) -> None:
-    keys = option_path.split('.')
-    data = config_data[filename]
-    for key in keys[:-1]:
-        data = data[key]
-    data[keys[-1]] = not data[keys[-1]]
-    ui_vars[filename][option_path].set(data[keys[-1]])
-
-def create_ui_components(options: Dict[str, Any], parent_frame: tk.Frame, config_data: Dict[str, Any], ui_vars: Dict[str, Any], toggle_option, lookup_table: Dict[str, str]) -> None:
-    errors = []
+    # Setting the variable fires its write trace, which marks the option dirty for the next apply.
+    accessor = get_option_path(option_path)
+    value = not accessor.get(config_data[filename])
+    accessor.set(config_data[filename], value)
+    ui_vars[filename][option_path].set(value)
+
+def create_option_variables(options: Dict[str, Any], config_data: Dict[str, Any], ui_vars: Dict[str, Any], lookup_table: Dict[str, str], on_change=None):
+    """Create and register the UI variable of every option; return ([(option path, filename, meta, var)], errors)."""
+    rows, errors = [], []
     for option_path, meta in options.items():
         filename = lookup_table.get(option_path)
         if not filename:
@@ -48,22 +44,178 @@ def create_ui_components(options: Dict[str, Any], parent_frame: tk.Frame, config
         try:
             if filename not in config_data or config_data[filename] is None:
                 raise FileNotFoundError(f"Configuration file not loaded: {filename}")
-            value = get_nested_value(config_data[filename], option_path.split('.'))
-        except (KeyError, FileNotFoundError, TypeError) as e:
+            value = get_option_path(option_path).get(config_data[filename])
+        except (KeyError, IndexError, ValueError, FileNotFoundError, TypeError) as e:
             error_msg = f"Failed to get value for {option_path} in {filename}. It may be missing or misspelled."
             logger.error(error_msg)
             errors.append(error_msg)
             continue
         var = create_variable(value)
         ui_vars[filename][option_path] = var
-        create_component(parent_frame, meta, var, option_path, filename, toggle_option, config_data, ui_vars)
+        if on_change:
+            track_variable(var, filename, option_path, on_change)
+        rows.append((option_path, filename, meta, var))
+    return rows, errors
+
+def create_ui_components(options: Dict[str, Any], parent_frame: tk.Frame, config_data: Dict[str, Any], ui_vars: Dict[str, Any], toggle_option, lookup_table: Dict[str, str], on_change=None, widgets=None) -> None:
+    rows, errors = create_option_variables(options, config_data, ui_vars, lookup_table, on_change)
+    for option_path, filename, meta, var in rows:
+        comp = create_component(parent_frame, meta, var, option_path, filename, toggle_option, config_data, ui_vars)
+        if widgets is not None:
+            widgets[(filename, option_path)] = comp
     if errors:
         messagebox.showwarning("Warning", "\n".join(errors))
 
+class VirtualOptionList:
+    """A large group's options in a fixed-height list that only has widgets for the rows in view.
+
+    Every option keeps its own variable in ui_vars, so applying and presets see
+    all of them; the few row widgets are rebound to other options' variables as
+    the list scrolls.
+    """
+
+    ROW_HEIGHT = 30
+
+    def __init__(self, parent: tk.Widget, rows, toggle_option, config_data: Dict[str, Any], ui_vars: Dict[str, Any], visible_rows: int = VIRTUAL_VISIBLE_ROWS):
+        self.rows = rows
+        self.toggle_option = toggle_option
+        self.config_data = config_data
+        self.ui_vars = ui_vars
+        self.visible_rows = min(visible_rows, len(rows))
+        self.first = 0
+        self.frame = ttk.Frame(parent)
+        self.body = ttk.Frame(self.frame, height=self.visible_rows * self.ROW_HEIGHT)
+        self.body.pack_propagate(False)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.pool = [self.create_row(index) for index in range(self.visible_rows)]
+        self.body.configure(width=self.measure_width())
+        for widget in [self.body] + [part for row in self.pool for part in row]:
+            widget.bind("<MouseWheel>", self.on_wheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+        self.redraw()
+
+    def create_row(self, index: int):
+        frame = ttk.Frame(self.body)
+        frame.place(x=0, y=index * self.ROW_HEIGHT, relwidth=1, height=self.ROW_HEIGHT)
+        label = ttk.Label(frame, anchor="w")
+        entry = tk.Entry(frame, width=30)
+        check = tk.Checkbutton(frame)
+        return frame, label, entry, check
+
+    def measure_width(self) -> int:
+        """The width of the widest row, laid out as create_component lays out an option."""
+        _, label, entry, check = self.pool[0]
+        label_font = tkfont.Font(font=ttk.Style(label).lookup("TLabel", "font") or "TkDefaultFont")
+        check_font = tkfont.Font(font=check.cget("font"))
+        check_width = check.winfo_reqwidth()  # the indicator and padding; the row has no text yet
+        entry_width = entry.winfo_reqwidth() + 10  # and the label's padx
+        widths = {}
+        for _, _, meta, var in self.rows:
+            key = (isinstance(var, tk.BooleanVar), meta["displayName"])
+            if key not in widths:
+                widths[key] = check_font.measure(key[1]) + check_width if key[0] else label_font.measure(key[1]) + entry_width
+        return max(widths.values())
+
+    def bind_row(self, row, index: int) -> None:
+        _, label, entry, check = row
+        option_path, filename, meta, var = self.rows[index]
+        for widget in (label, entry, check):
+            widget.pack_forget()
+        if isinstance(var, tk.BooleanVar):
+            check.config(text=meta["displayName"], variable=var,
+                         command=lambda: self.toggle_option(option_path, filename, self.config_data, self.ui_vars))
+            check.pack(side="left")
+            comp = check
+        else:
+            label.config(text=meta["displayName"])
+            label.pack(side="left", padx=5)
+            entry.config(textvariable=var)
+            entry.pack(side="left")
+            comp = entry
+        manager = get_tooltip_manager(comp)
+        for widget in (entry, check):
+            manager.texts.pop(str(widget), None)
+        if "description" in meta:
+            manager.register(comp, meta["description"])
+
+    def redraw(self) -> None:
+        for offset, row in enumerate(self.pool):
+            self.bind_row(row, self.first + offset)
+        total = len(self.rows)
+        self.scrollbar.set(self.first / total, (self.first + self.visible_rows) / total)
+
+    def scroll_to(self, first: int) -> None:
+        first = max(0, min(first, len(self.rows) - self.visible_rows))
+        if first == self.first:
+            return
+        try:
+            focused = self.frame.focus_get()
+        except KeyError:
+            focused = None
+        if any(focused is row[2] for row in self.pool):
+            # Otherwise typing would go on in whatever option the entry shows next
+            self.body.focus_set()
+        self.first = first
+        self.redraw()
+
+    def scroll(self, rows: int) -> str:
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def on_wheel(self, event) -> str:
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def yview(self, action, amount, unit=None) -> None:
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" | "pages")."""
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.rows)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def show(self, index: int) -> tk.Widget:
+        """Scroll the row of the option at index into view and return its input widget."""
+        if not self.first <= index < self.first + self.visible_rows:
+            self.scroll_to(index - self.visible_rows // 3)
+        _, _, entry, check = self.pool[index - self.first]
+        return check if check.winfo_manager() else entry
+
+class VirtualOption:
+    """Stands in for an option's widget in a VirtualOptionList until it is scrolled into view."""
+    __slots__ = ("option_list", "index")
+
+    def __init__(self, option_list: VirtualOptionList, index: int):
+        self.option_list = option_list
+        self.index = index
+
+    def show(self) -> tk.Widget:
+        return self.option_list.show(self.index)
+
+def create_virtual_components(options: Dict[str, Any], parent_frame: tk.Frame, config_data: Dict[str, Any], ui_vars: Dict[str, Any], toggle_option, lookup_table: Dict[str, str], on_change=None, widgets=None) -> VirtualOptionList:
+    """Like create_ui_components, but the rows are shown in a VirtualOptionList."""
+    rows, errors = create_option_variables(options, config_data, ui_vars, lookup_table, on_change)
+    option_list = None
+    if rows:
+        option_list = VirtualOptionList(parent_frame, rows, toggle_option, config_data, ui_vars)
+        option_list.frame.pack(fill="x", pady=2)
+        if widgets is not None:
+            for index, (option_path, filename, _, _) in enumerate(rows):
+                widgets[(filename, option_path)] = VirtualOption(option_list, index)
+    if errors:
+        messagebox.showwarning("Warning", "\n".join(errors))
+    return option_list
+
 def create_variable(value: Any) -> tk.Variable:
     return tk.BooleanVar(value=value) if isinstance(value, bool) else tk.StringVar(value=str(value))
 
-def create_component(parent_frame: tk.Frame, meta: Dict[str, Any], var: tk.Variable, option_path: str, filename: str, toggle_option, config_data: Dict[str, Any], ui_vars: Dict[str, Any]) -> None:
+def track_variable(var: tk.Variable, filename: str, option_path: str, on_change) -> None:
+    """Call on_change(filename, option_path) whenever the variable is written."""
+    var.trace_add("write", lambda *_: on_change(filename, option_path))
+
+def create_component(parent_frame: tk.Frame, meta: Dict[str, Any], var: tk.Variable, option_path: str, filename: str, toggle_option, config_data: Dict[str, Any], ui_vars: Dict[str, Any]) -> tk.Widget:
     frame = ttk.Frame(parent_frame)
     frame.pack(fill="x", pady=2)
     if isinstance(var, tk.BooleanVar):
@@ -74,10 +226,12 @@ def create_component(parent_frame: tk.Frame, meta: Dict[str, Any], var: tk.Varia
     comp.pack(side="left")
     if "description" in meta:
         create_tooltip(comp, meta["description"])
+    return comp
 
-def create_grouped_ui(tab_name: str, group_options: Dict[str, Any], notebook: ttk.Notebook, filename: str, config_data: Dict[str, Any], ui_vars: Dict[str, Any], toggle_option, lookup_table: Dict[str, str]) -> None:
-    tab_frame = ttk.Frame(notebook)
-    notebook.add(tab_frame, text=tab_name)
+def create_grouped_ui(tab_name: str, group_options: Dict[str, Any], notebook: ttk.Notebook, filename: str, config_data: Dict[str, Any], ui_vars: Dict[str, Any], toggle_option, lookup_table: Dict[str, str], on_change=None, tab_frame: ttk.Frame = None, widgets=None) -> None:
+    if tab_frame is None:
+        tab_frame = ttk.Frame(notebook)
+        notebook.add(tab_frame, text=tab_name)
 
     for group_name, options in group_options.items():
         group_frame = ttk.Frame(tab_frame)
@@ -96,12 +250,16 @@ def create_grouped_ui(tab_name: str, group_options: Dict[str, Any], notebook: tt
             return lambda: toggle_group(cf, tb)
 
         toggle_button.config(command=create_toggle_command(content_frame, toggle_button))
+        content_frame.toggle_button = toggle_button  # lets reveal_widget expand a hidden group
 
         group_title = ttk.Label(group_title_frame, text=group_name, font=("Arial", 12, "bold"))
         group_title.pack(side="left", padx=5, pady=5)
         group_title.bind("<Button-1>", lambda e, cf=content_frame, tb=toggle_button: toggle_group(cf, tb))
 
-        create_ui_components(options, content_frame, config_data, ui_vars, toggle_option, lookup_table)
+        if len(options) > VIRTUAL_THRESHOLD:
+            create_virtual_components(options, content_frame, config_data, ui_vars, toggle_option, lookup_table, on_change, widgets)
+        else:
+            create_ui_components(options, content_frame, config_data, ui_vars, toggle_option, lookup_table, on_change, widgets)
 
 def toggle_group(content_frame: ttk.Frame, toggle_button: ttk.Button) -> None:
     if content_frame.winfo_ismapped():
@@ -111,25 +269,380 @@ def toggle_group(content_frame: ttk.Frame, toggle_button: ttk.Button) -> None:
         content_frame.pack(fill="x", padx=5, pady=5)
         toggle_button.config(text="Hide")
 
+class TooltipManager:
+    """One tooltip window shared by every widget of a Tk root.
+
+    Texts are kept in a registry keyed by widget path and looked up when the
+    pointer enters a widget, so no per-widget windows or bindings are created.
+    """
+
+    def __init__(self, root: tk.Tk, delay: int = 400):
+        self.root = root
+        self.delay = delay
+        self.texts: Dict[str, str] = {}
+        self.window = None
+        self.label = None
+        self.after_id = None
+        root.bind_all("<Enter>", self.on_enter, add="+")
+        root.bind_all("<Leave>", self.hide, add="+")
+        root.bind_all("<ButtonPress>", self.hide, add="+")
+        root.bind_all("<Destroy>", lambda e: self.texts.pop(str(e.widget), None), add="+")
+
+    def register(self, widget: tk.Widget, text: str) -> None:
+        self.texts[str(widget)] = text
+
+    def on_enter(self, event) -> None:
+        text = self.texts.get(str(event.widget))
+        if text is None:
+            return
+        self.cancel()
+        self.after_id = self.root.after(self.delay, lambda: self.show(text))
+
+    def show(self, text: str) -> None:
+        self.after_id = None
+        if self.window is None:
+            self.window = tk.Toplevel(self.root)
+            self.window.wm_overrideredirect(True)
+            self.label = tk.Label(self.window, background="yellow", relief="solid", borderwidth=1)
+            self.label.pack()
+        x, y = self.root.winfo_pointerxy()
+        self.label.config(text=text)
+        self.window.wm_geometry(f"+{x + 10}+{y + 10}")
+        self.window.deiconify()
+        self.window.lift()
+
+    def cancel(self) -> None:
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def hide(self, event=None) -> None:
+        self.cancel()
+        if self.window is not None:
+            self.window.withdraw()
+
+def get_tooltip_manager(widget: tk.Widget) -> TooltipManager:
+    root = widget._root()
+    if getattr(root, "tooltip_manager", None) is None:
+        root.tooltip_manager = TooltipManager(root)
+    return root.tooltip_manager
+
 def create_tooltip(widget: tk.Widget, text: str) -> None:
-    tooltip = tk.Toplevel(widget)
-    tooltip.wm_overrideredirect(True)
-    tooltip.withdraw()
+    get_tooltip_manager(widget).register(widget, text)
+
+def create_splash(root: tk.Tk, total: int) -> tk.Toplevel:
+    """Show a small borderless window with a progress bar while configuration files load."""
+    splash = tk.Toplevel(root)
+    splash.wm_overrideredirect(True)
+    frame = ttk.Frame(splash, padding=15, relief="solid", borderwidth=1)
+    frame.pack(fill="both", expand=True)
+    ttk.Label(frame, text="Loading configuration files...", font=("Arial", 12, "bold")).pack(anchor="w")
+    splash.progress = ttk.Progressbar(frame, length=320, maximum=max(total, 1))
+    splash.progress.pack(fill="x", pady=(10, 5))
+    splash.file_label = ttk.Label(frame, text=f"0/{total}", anchor="w")
+    splash.file_label.pack(fill="x")
+
+    splash.update_idletasks()
+    x = int(splash.winfo_screenwidth() / 2 - splash.winfo_reqwidth() / 2)
+    y = int(splash.winfo_screenheight() / 2 - splash.winfo_reqheight() / 2)
+    splash.wm_geometry(f"+{x}+{y}")
+    return splash
 
-    label = tk.Label(tooltip, text=text, background="yellow", relief="solid", borderwidth=1)
-    label.pack()
+def update_splash(splash: tk.Toplevel, done: int, total: int, filename: str) -> None:
+    splash.progress.config(maximum=max(total, 1), value=done)
+    splash.file_label.config(text=f"{done}/{total} {filename}")
 
-    def show_tooltip(event):
-        x = event.x_root + 10
-        y = event.y_root + 10
-        tooltip.wm_geometry(f"+{x}+{y}")
-        tooltip.deiconify()
+def create_progress_dialog(root: tk.Tk, title: str, total: int, on_cancel) -> tk.Toplevel:
+    """Show a modal progress window with a Cancel button for a background task.
 
-    def hide_tooltip(event):
-        tooltip.withdraw()
+    The window grabs all input, so nothing in the main window can change the
+    data the task is working on until it is destroyed.
+    """
+    dialog = tk.Toplevel(root)
+    dialog.title(title)
+    dialog.transient(root)
+    dialog.resizable(False, False)
+    dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+    frame = ttk.Frame(dialog, padding=15)
+    frame.pack(fill="both", expand=True)
+    dialog.done = 0
+    dialog.progress = ttk.Progressbar(frame, length=320, maximum=max(total, 1))
+    dialog.progress.pack(fill="x", pady=(0, 5))
+    dialog.file_label = ttk.Label(frame, text=f"0/{total}", anchor="w")
+    dialog.file_label.pack(fill="x")
 
-    widget.bind("<Enter>", show_tooltip)
-    widget.bind("<Leave>", hide_tooltip)
+    def cancel():
+        cancel_button.config(state="disabled", text="Cancelling...")
+        on_cancel()
+
+    cancel_button = ttk.Button(frame, text="Cancel", command=cancel)
+    cancel_button.pack(pady=(10, 0))
+    try:
+        dialog.wait_visibility()
+        dialog.grab_set()
+        cancel_button.focus_set()
+    except tk.TclError as e:
+        logger.warning(f"Could not make the progress window modal: {e}")
+    return dialog
+
+def update_progress_dialog(dialog: tk.Toplevel, filename: str) -> None:
+    dialog.done += 1
+    total = int(dialog.progress.cget("maximum"))
+    dialog.progress.config(value=dialog.done)
+    dialog.file_label.config(text=f"{dialog.done}/{total} {filename}")
+
+def create_diff_dialog(root: tk.Tk, rows, on_apply) -> tk.Toplevel:
+    """List changes as (tab, file, option, current, new) rows and apply the selected ones.
+
+    All rows start selected; on_apply receives the indexes of the selected rows.
+    """
+    dialog = tk.Toplevel(root)
+    dialog.title(f"Preset changes ({len(rows)})")
+    dialog.transient(root)
+    dialog.geometry("900x500")
+    frame = ttk.Frame(dialog, padding=10)
+    frame.pack(fill="both", expand=True)
+
+    tab_filter = tk.StringVar(value="All tabs")
+    tabs = ["All tabs"] + sorted({row[0] for row in rows})
+    top = ttk.Frame(frame)
+    top.pack(fill="x", pady=(0, 5))
+    ttk.Label(top, text="Tab:").pack(side=tk.LEFT)
+    ttk.Combobox(top, textvariable=tab_filter, values=tabs, state="readonly", width=30).pack(side=tk.LEFT, padx=5)
+    count_label = ttk.Label(top)
+    count_label.pack(side=tk.RIGHT)
+
+    columns = ("file", "option", "current", "new")
+    tree = ttk.Treeview(frame, columns=columns, show="headings", selectmode="extended")
+    for column, width in zip(columns, (160, 260, 200, 200)):
+        tree.heading(column, text=column.capitalize())
+        tree.column(column, width=width, anchor="w")
+    scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side=tk.RIGHT, fill="y")
+    tree.pack(fill="both", expand=True)
+
+    # Selection is kept per row index, so it survives switching the tab filter
+    selected = set(range(len(rows)))
+
+    def refresh(*_):
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        shown = [index for index, row in enumerate(rows) if tab_filter.get() in ("All tabs", row[0])]
+        for index in shown:
+            tree.insert("", "end", iid=str(index), values=rows[index][1:])
+        tree.selection_set([str(index) for index in shown if index in selected])
+        update_count()
+
+    def update_count():
+        count_label.config(text=f"{len(selected)} of {len(rows)} selected")
+
+    def on_select(_):
+        shown = {int(iid) for iid in tree.get_children()}
+        selected.difference_update(shown)
+        selected.update(int(iid) for iid in tree.selection())
+        update_count()
+
+    def select_shown(state):
+        tree.selection_set(tree.get_children() if state else ())
+
+    def apply():
+        dialog.destroy()
+        on_apply(sorted(selected))
+
+    tab_filter.trace_add("write", refresh)
+    tree.bind("<<TreeviewSelect>>", on_select)
+
+    buttons = ttk.Frame(frame)
+    buttons.pack(fill="x", pady=(5, 0))
+    ttk.Button(buttons, text="Select All", command=lambda: select_shown(True)).pack(side=tk.LEFT)
+    ttk.Button(buttons, text="Select None", command=lambda: select_shown(False)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT)
+    ttk.Button(buttons, text="Apply Selected", command=apply).pack(side=tk.RIGHT, padx=5)
+    refresh()
+    return dialog
+
+def format_preset_preview(entry: Dict[str, Any]) -> str:
+    modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime_ns"] / 1e9))
+    kind = "Legacy (whole files)" if entry["version"] == 1 else f"Version {entry['version']}"
+    lines = [entry["name"], f"{kind}, {entry['size'] / 1024:.1f} KB, modified {modified}", ""]
+    if entry.get("error"):
+        return "\n".join(lines + [f"Could not be read: {entry['error']}"])
+    lines.append(f"Files ({len(entry['files'])}):")
+    lines.extend(f"  {filename}" for filename in entry["files"])
+    lines.extend(["", f"Options ({entry['options']}):"])
+    lines.extend(f"  {filename}: {option_path} = {value}" for filename, option_path, value in entry["summary"])
+    if entry["options"] > len(entry["summary"]):
+        lines.append(f"  ... and {entry['options'] - len(entry['summary'])} more")
+    return "\n".join(lines)
+
+def create_preset_browser(root: tk.Tk, list_presets, on_load, on_browse) -> tk.Toplevel:
+    """List indexed presets with a filter and a preview of the selected one, without opening any preset file.
+
+    list_presets(query) returns the matching index entries; on_load gets the
+    chosen entry, on_browse is called to pick a file outside the library instead.
+    """
+    dialog = tk.Toplevel(root)
+    dialog.title("Load Preset")
+    dialog.transient(root)
+    dialog.geometry("900x500")
+    frame = ttk.Frame(dialog, padding=10)
+    frame.pack(fill="both", expand=True)
+
+    query = tk.StringVar()
+    top = ttk.Frame(frame)
+    top.pack(fill="x", pady=(0, 5))
+    ttk.Label(top, text="Filter:").pack(side=tk.LEFT)
+    filter_entry = ttk.Entry(top, textvariable=query, width=40)
+    filter_entry.pack(side=tk.LEFT, padx=5)
+    count_label = ttk.Label(top)
+    count_label.pack(side=tk.RIGHT)
+
+    panes = ttk.PanedWindow(frame, orient="horizontal")
+    panes.pack(fill="both", expand=True)
+    list_frame = ttk.Frame(panes)
+    columns = ("name", "files", "options", "modified")
+    tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
+    for column, width in zip(columns, (220, 50, 60, 120)):
+        tree.heading(column, text=column.capitalize())
+        tree.column(column, width=width, anchor="w")
+    scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side=tk.RIGHT, fill="y")
+    tree.pack(fill="both", expand=True)
+    preview = tk.Text(panes, wrap="none", width=50, state="disabled")
+    panes.add(list_frame, weight=1)
+    panes.add(preview, weight=1)
+
+    shown = []
+
+    def refresh(*_):
+        shown[:] = list_presets(query.get())
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        for index, entry in enumerate(shown):
+            modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime_ns"] / 1e9))
+            tree.insert("", "end", iid=str(index), values=(entry["name"], len(entry["files"]), entry["options"], modified))
+        count_label.config(text=f"{len(shown)} preset(s)")
+        if shown:
+            tree.selection_set("0")
+        else:
+            show_preview(None)
+
+    def show_preview(entry):
+        preview.config(state="normal")
+        preview.delete("1.0", "end")
+        if entry is not None:
+            preview.insert("1.0", format_preset_preview(entry))
+        preview.config(state="disabled")
+
+    def selected_entry():
+        selection = tree.selection()
+        return shown[int(selection[0])] if selection else None
+
+    def load(event=None):
+        entry = selected_entry()
+        if entry is not None and not entry.get("error"):
+            dialog.destroy()
+            on_load(entry)
+
+    def browse():
+        dialog.destroy()
+        on_browse()
+
+    query.trace_add("write", refresh)
+    tree.bind("<<TreeviewSelect>>", lambda e: show_preview(selected_entry()))
+    tree.bind("<Double-1>", load)
+    filter_entry.bind("<Return>", load)
+
+    buttons = ttk.Frame(frame)
+    buttons.pack(fill="x", pady=(5, 0))
+    ttk.Button(buttons, text="Browse...", command=browse).pack(side=tk.LEFT)
+    ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT)
+    ttk.Button(buttons, text="Load", command=load).pack(side=tk.RIGHT, padx=5)
+    refresh()
+    filter_entry.focus_set()
+    return dialog
+
+def create_search_bar(parent: tk.Widget, search, on_select) -> ttk.Entry:
+    """An entry that lists search(query) results as you type; on_select gets the chosen result.
+
+    search returns (tab, filename, option path, display name) tuples.
+    """
+    query = tk.StringVar()
+    entry = ttk.Entry(parent, textvariable=query, width=30)
+    popup = tk.Toplevel(entry)
+    popup.wm_overrideredirect(True)
+    popup.withdraw()
+    listbox = tk.Listbox(popup, width=70, height=10, activestyle="dotbox")
+    listbox.pack(fill="both", expand=True)
+    results = []
+
+    def update(*_):
+        results[:] = search(query.get())
+        listbox.delete(0, "end")
+        for tab, _, option_path, display_name in results:
+            listbox.insert("end", f"{display_name}  ({tab}: {option_path})")
+        if not results:
+            popup.withdraw()
+            return
+        listbox.selection_clear(0, "end")
+        listbox.selection_set(0)
+        popup.wm_geometry(f"+{entry.winfo_rootx()}+{entry.winfo_rooty() + entry.winfo_height()}")
+        popup.deiconify()
+        popup.lift()
+
+    def choose(event=None):
+        selection = listbox.curselection()
+        if results and selection:
+            popup.withdraw()
+            on_select(results[selection[0]])
+        return "break"
+
+    def move(step):
+        if not results:
+            return "break"
+        selection = listbox.curselection()
+        index = min(max((selection[0] if selection else -1) + step, 0), len(results) - 1)
+        listbox.selection_clear(0, "end")
+        listbox.selection_set(index)
+        listbox.see(index)
+        return "break"
+
+    query.trace_add("write", update)
+    entry.bind("<Return>", choose)
+    entry.bind("<Down>", lambda e: move(1))
+    entry.bind("<Up>", lambda e: move(-1))
+    entry.bind("<Escape>", lambda e: popup.withdraw())
+    entry.bind("<FocusOut>", lambda e: entry.after(200, popup.withdraw))
+    listbox.bind("<ButtonRelease-1>", choose)
+    return entry
+
+def reveal_widget(canvas: tk.Canvas, content: tk.Widget, widget: tk.Widget) -> None:
+    """Expand the widget's group if hidden, scroll the canvas to it and flash it.
+
+    widget may be a VirtualOption, whose row is scrolled into view first.
+    """
+    if isinstance(widget, VirtualOption):
+        widget = widget.show()
+    group_content = widget.master
+    while group_content is not None and not hasattr(group_content, "toggle_button"):
+        group_content = group_content.master
+    if group_content is not None and group_content.winfo_manager() == "":
+        toggle_group(group_content, group_content.toggle_button)
+    canvas.update_idletasks()
+    height = max(content.winfo_height(), 1)
+    y = widget.winfo_rooty() - content.winfo_rooty()
+    canvas.yview_moveto(max(y - canvas.winfo_height() / 3, 0) / height)
+    widget.focus_set()
+    try:
+        background = widget.cget("background")
+        widget.config(background="yellow")
+        widget.after(1500, lambda: widget.winfo_exists() and widget.config(background=background))
+    except tk.TclError:
+        pass
 
 # Assuming lookup_table is populated elsewhere in the code and is available globally
 lookup_table = {}